@@ -0,0 +1,225 @@
+"""Experimental asyncio (aiohttp) download engine.
+
+A prototype for benchmarks/bench_engines.py to compare against the threaded
+requests engine in downloader.py, which stays the engine used by the menu,
+batch mode and handle_download. It shares that engine's output naming,
+temp-file replacement, segment retries and bandwidth limits, but has no
+resume support (no .part sidecars or HLS manifests).
+"""
+import asyncio
+import contextlib
+import os
+import random
+from pathlib import Path
+import aiohttp
+from tqdm import tqdm
+import downloader
+import ratelimit
+
+# Maximum number of requests in flight at once
+ASYNC_MAX_CONCURRENCY = 64
+# Chunk size used when streaming response bodies
+ASYNC_CHUNK_SIZE = 256 * 1024
+
+@contextlib.asynccontextmanager
+async def _open_session(session: aiohttp.ClientSession = None, max_concurrency: int = ASYNC_MAX_CONCURRENCY):
+    """Yields the given session, or a new pooled session that is closed afterwards."""
+    if session is not None:
+        yield session
+        return
+
+    connect_timeout, read_timeout = downloader.HTTP_TIMEOUT
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+    async with aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={'User-Agent': downloader.USER_AGENT},
+    ) as new_session:
+        yield new_session
+
+async def _write(f, data: bytes):
+    """Writes to a file without blocking the event loop."""
+    await asyncio.to_thread(f.write, data)
+
+async def _throttle(amount: int, job_limiter=None):
+    """Accounts bytes against the bandwidth limits, sleeping in a worker thread when over them."""
+    if ratelimit.is_limited():
+        await asyncio.to_thread(ratelimit.throttle, amount, job_limiter)
+
+async def download_direct_url_async(url: str, output_path: Path, headers: dict = None,
+                                    session: aiohttp.ClientSession = None):
+    """Downloads a file from a direct URL with a progress bar. Returns the file path or None."""
+    file_path = downloader.claim_output_path(output_path / downloader.direct_output_filename(url))
+    safe_filename = file_path.name
+    tmp_path = downloader.temp_output_path(file_path)
+    job_limiter = ratelimit.new_job_limiter()
+
+    try:
+        async with _open_session(session) as session:
+            async with session.get(url, headers=headers or {}) as response:
+                response.raise_for_status()
+                total_size = int(response.headers.get('Content-Length', 0))
+
+                print(f"Downloading: {safe_filename}")
+                with tqdm(total=total_size, unit='B', unit_scale=True, unit_divisor=1024, desc=safe_filename) as pbar:
+                    with open(tmp_path, 'wb') as f:
+                        async for chunk in response.content.iter_chunked(ASYNC_CHUNK_SIZE):
+                            await _throttle(len(chunk), job_limiter)
+                            await _write(f, chunk)
+                            pbar.update(len(chunk))
+
+        os.replace(tmp_path, file_path)
+        print(f"✅ Download complete: {file_path}")
+        return file_path
+
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+        print(f"❌ Error downloading direct URL: {e}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+async def _fetch_segment(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                         segment_url: str, headers: dict, job_limiter=None) -> bytes:
+    """Fetches one HLS segment while holding a concurrency slot.
+
+    Failed attempts are retried like the threaded engine does: up to
+    HLS_SEGMENT_RETRIES times with jittered exponential backoff.
+    """
+    for attempt in range(downloader.HLS_SEGMENT_RETRIES + 1):
+        try:
+            async with semaphore:
+                async with session.get(segment_url, headers=headers) as response:
+                    response.raise_for_status()
+                    data = await response.read()
+            await _throttle(len(data), job_limiter)
+            return data
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == downloader.HLS_SEGMENT_RETRIES:
+                raise
+            await asyncio.sleep(downloader.HLS_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
+async def download_hls_async(m3u8_url: str, output_path: Path, title: str = None, referer: str = None,
+                             session: aiohttp.ClientSession = None,
+                             max_concurrency: int = ASYNC_MAX_CONCURRENCY):
+    """Downloads an HLS playlist by fetching its segments concurrently. Returns the file path or None.
+
+    A segment that still fails after its retries stops the download rather
+    than leaving a gap in the file.
+    """
+    headers = {'Referer': referer} if referer else {}
+
+    try:
+        async with _open_session(session, max_concurrency) as session:
+            print("Downloading playlist...")
+            async with session.get(m3u8_url, headers=headers) as response:
+                response.raise_for_status()
+                playlist_content = await response.text()
+
+            if '#EXT-X-STREAM-INF' in playlist_content:
+                print("Master playlist detected, selecting a stream...")
+                # Selection may probe variant throughput with blocking requests
+                variant = await asyncio.to_thread(downloader.select_variant, playlist_content, m3u8_url, headers)
+                if not variant:
+                    print("❌ No valid stream found in master playlist")
+                    return None
+                print(f"Selected stream: {variant['url']}")
+                return await download_hls_async(variant['url'], output_path, title, referer,
+                                                session, max_concurrency)
+
+            segments = downloader.parse_media_playlist(playlist_content, m3u8_url)
+            if not segments:
+                print("❌ No video segments found in playlist")
+                return None
+            print(f"Found {len(segments)} video segments")
+
+            file_path = downloader.claim_output_path(output_path / downloader.hls_output_filename(title))
+            tmp_path = downloader.temp_output_path(file_path)
+            job_limiter = ratelimit.new_job_limiter()
+            semaphore = asyncio.Semaphore(max(1, max_concurrency))
+            # Only keep a bounded window of segments scheduled ahead of the writer,
+            # so segments that finish early cannot pile up in memory
+            window = max(1, max_concurrency) * 2
+            tasks = {}
+
+            def schedule(index: int):
+                if index < len(segments) and index not in tasks:
+                    tasks[index] = asyncio.create_task(
+                        _fetch_segment(session, semaphore, segments[index], headers, job_limiter))
+
+            for i in range(min(window, len(segments))):
+                schedule(i)
+
+            try:
+                with open(tmp_path, 'wb') as f, tqdm(total=len(segments), desc="Segments") as pbar:
+                    for i in range(len(segments)):
+                        schedule(i + window)
+                        try:
+                            data = await tasks.pop(i)
+                        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                            print(f"❌ Segment {i} failed after {downloader.HLS_SEGMENT_RETRIES} retries: {e}")
+                            tmp_path.unlink(missing_ok=True)
+                            return None
+                        await _write(f, data)
+                        pbar.update(1)
+            finally:
+                for task in tasks.values():
+                    task.cancel()
+
+            os.replace(tmp_path, file_path)
+
+        print(f"✅ HLS download complete (async): {file_path}")
+        return file_path
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"❌ Error in async HLS download: {e}")
+        return None
+
+async def download_from_iframe_async(url: str, output_path: Path, referer: str = None,
+                                     session: aiohttp.ClientSession = None):
+    """Finds media on a page and its iframes and downloads the best candidate. Returns the file path or None.
+
+    The crawl itself is downloader.crawl_page_media (visited set, depth and page
+    limits, relative URL resolution); only the media download uses this engine.
+    """
+    try:
+        print(f"Crawling page for media: {url}")
+        candidates = await asyncio.to_thread(downloader.crawl_page_media, url, referer)
+        if not candidates:
+            print("❌ No video sources or iframes found on the page.")
+            return None
+
+        print(f"Found {len(candidates)} media source(s)")
+        async with _open_session(session) as session:
+            # Try the best candidate first and fall back to the next ones
+            for candidate in candidates:
+                print(f"Trying: {candidate['url']}")
+                if candidate['kind'] == 'hls':
+                    result = await download_hls_async(candidate['url'], output_path, candidate['title'],
+                                                      candidate['page_url'], session)
+                else:
+                    result = await download_direct_url_async(candidate['url'], output_path,
+                                                             {'Referer': candidate['page_url']}, session)
+                if result:
+                    return result
+
+        print("❌ None of the media sources could be downloaded.")
+        return None
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"❌ Error processing iframe URL: {e}")
+        return None
+
+### Synchronous wrappers
+
+def download_direct_url(url: str, output_path: Path, headers: dict = None):
+    """Blocking wrapper around download_direct_url_async."""
+    return asyncio.run(download_direct_url_async(url, output_path, headers))
+
+def download_hls(m3u8_url: str, output_path: Path, title: str = None, referer: str = None,
+                 max_concurrency: int = ASYNC_MAX_CONCURRENCY):
+    """Blocking wrapper around download_hls_async."""
+    return asyncio.run(download_hls_async(m3u8_url, output_path, title, referer, max_concurrency=max_concurrency))
+
+def download_from_iframe(url: str, output_path: Path, referer: str = None):
+    """Blocking wrapper around download_from_iframe_async."""
+    return asyncio.run(download_from_iframe_async(url, output_path, referer))
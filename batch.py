@@ -0,0 +1,129 @@
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from urllib.parse import urlparse
+import downloader
+
+# Default limits for batch downloads
+BATCH_JOBS = 4
+BATCH_PER_HOST = 2
+
+def read_url_list(source: str) -> list:
+    """Reads URLs from a file, or from stdin when source is '-'. Skips blank lines and # comments."""
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+
+def _host_of(url: str) -> str:
+    """Returns the host used for per-host concurrency limits."""
+    return urlparse(url).netloc.lower() or url
+
+def format_size(num_bytes: int) -> str:
+    """Formats a byte count for display."""
+    size = float(num_bytes)
+    for unit in ['B', 'KB', 'MB']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def _run_job(url: str, download_path: Path, use_index: bool = True) -> dict:
+    """Downloads a single URL through handle_download and records the outcome."""
+    start = time.perf_counter()
+    error = None
+    try:
+        result = downloader.handle_download(url, download_path, use_index)
+        if not result:
+            error = "download failed (see log above)"
+    except Exception as e:
+        result = None
+        error = str(e)
+
+    size = 0
+    if result and Path(result).is_file():
+        size = Path(result).stat().st_size
+
+    return {
+        'url': url,
+        'path': result,
+        'ok': error is None,
+        'bytes': size,
+        'seconds': time.perf_counter() - start,
+        'error': error,
+    }
+
+def run_batch(urls: list, download_path: Path, jobs: int = BATCH_JOBS, per_host: int = BATCH_PER_HOST,
+              use_index: bool = True) -> list:
+    """Downloads all URLs concurrently, with a global cap and a per-host cap on running jobs.
+
+    URLs that map to the same local filename (the same URL twice, or untitled
+    streams) are saved under numbered names instead of overwriting each other.
+    Returns one result dict per URL, in input order.
+    """
+    jobs = max(1, jobs)
+    per_host = max(1, per_host)
+    pending = deque(enumerate(urls))
+    running = {}  # future -> (index, host)
+    host_counts = defaultdict(int)
+    results = [None] * len(urls)
+
+    # Jobs that resolve to the same filename each get their own file
+    with downloader.hold_output_claims(), ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            # Start every waiting job whose host still has capacity
+            for _ in range(len(pending)):
+                if len(running) >= jobs:
+                    break
+                index, url = pending.popleft()
+                host = _host_of(url)
+                if host_counts[host] >= per_host:
+                    pending.append((index, url))
+                    continue
+                host_counts[host] += 1
+                running[executor.submit(_run_job, url, download_path, use_index)] = (index, host)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, host = running.pop(future)
+                host_counts[host] -= 1
+                results[index] = future.result()
+
+    return results
+
+def print_summary(results: list, wall_time: float):
+    """Prints a table of per-URL outcomes followed by totals."""
+    print("\n--- Batch Download Summary ---")
+    print(f"{'#':>3}  {'Status':<6}  {'Size':>10}  {'Time':>8}  URL")
+    for i, result in enumerate(results):
+        status = "OK" if result['ok'] else "FAILED"
+        print(f"{i + 1:>3}  {status:<6}  {format_size(result['bytes']):>10}  {result['seconds']:>7.1f}s  {result['url']}")
+        if result['error']:
+            print(f"{'':>3}  ↳ {result['error']}")
+
+    succeeded = sum(1 for result in results if result['ok'])
+    total_bytes = sum(result['bytes'] for result in results)
+    print(f"\n✅ Succeeded: {succeeded}")
+    print(f"❌ Failed:    {len(results) - succeeded}")
+    print(f"📦 Total:     {format_size(total_bytes)}")
+    print(f"⏱️  Wall time: {wall_time:.1f}s")
+
+def run_batch_cli(source: str, download_path: Path, jobs: int = BATCH_JOBS, per_host: int = BATCH_PER_HOST,
+                  use_index: bool = True) -> bool:
+    """Runs a batch download from a URL list and prints the summary. Returns True if every URL succeeded."""
+    urls = read_url_list(source)
+    if not urls:
+        print("❌ No URLs found in the batch list.")
+        return False
+
+    print(f"📋 Batch download: {len(urls)} URL(s), {jobs} concurrent job(s), {per_host} per host")
+    start = time.perf_counter()
+    results = run_batch(urls, download_path, jobs, per_host, use_index)
+    print_summary(results, time.perf_counter() - start)
+
+    return all(result['ok'] for result in results)
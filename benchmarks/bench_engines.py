@@ -0,0 +1,61 @@
+"""Benchmark: threaded requests engine vs asyncio engine on many small HLS segments.
+
+Usage: python benchmarks/bench_engines.py [--segments N] [--segment-size BYTES] [--latency S] [--concurrency N]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import async_downloader
+import downloader
+import utils
+from local_server import StandInServer
+
+
+def timed(func, *args, **kwargs):
+    """Runs func quietly and returns (result, elapsed seconds)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=2000)
+    parser.add_argument('--segment-size', type=int, default=16 * 1024)
+    parser.add_argument('--latency', type=float, default=0.02, help="Per-request latency in seconds")
+    parser.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    utils.DATA_DIR = Path(scratch_dir.name)
+
+    with StandInServer(latency=args.latency, segment_count=args.segments, segment_size=args.segment_size) as server:
+        playlist_url = f"{server.base_url}/hls/media.m3u8"
+        expected = server.segment_count * len(server.segment_payload)
+        print(f"{args.segments} segments of {args.segment_size} bytes, "
+              f"{args.latency * 1000:.0f} ms latency, concurrency {args.concurrency}")
+
+        engines = [
+            ('threads', lambda out: downloader.download_hls_alternative(
+                playlist_url, out, 'bench', max_workers=args.concurrency)),
+            ('asyncio', lambda out: async_downloader.download_hls(
+                playlist_url, out, 'bench', max_concurrency=args.concurrency)),
+        ]
+        for name, run in engines:
+            with tempfile.TemporaryDirectory() as out_dir:
+                result, elapsed = timed(run, Path(out_dir))
+                if not result or Path(result).stat().st_size != expected:
+                    raise RuntimeError(f"{name} engine produced incomplete output")
+            print(f"{name:<8} {elapsed:6.2f}s  {args.segments / elapsed:8.0f} segments/s")
+
+
+if __name__ == '__main__':
+    main()
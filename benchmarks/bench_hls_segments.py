@@ -0,0 +1,58 @@
+"""Benchmark: sequential vs concurrent HLS segment fetching.
+
+Usage: python benchmarks/bench_hls_segments.py [--segments N] [--latency S] [--workers 1,4,8,16]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import downloader
+import utils
+from local_server import StandInServer
+
+
+def run_once(server, workers: int) -> float:
+    """Runs download_hls_alternative once and returns elapsed wall time."""
+    with tempfile.TemporaryDirectory() as out_dir:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            downloader.download_hls_alternative(
+                f"{server.base_url}/hls/media.m3u8", Path(out_dir), "bench", max_workers=workers
+            )
+        elapsed = time.perf_counter() - start
+        output_file = Path(out_dir) / "bench.mp4"
+        expected = server.segment_count * len(server.segment_payload)
+        if not output_file.exists() or output_file.stat().st_size != expected:
+            raise RuntimeError(f"Output mismatch for workers={workers}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help="Per-request latency in seconds")
+    parser.add_argument('--workers', default='1,4,8,16', help="Comma separated worker counts")
+    args = parser.parse_args()
+
+    worker_counts = [int(w) for w in args.workers.split(',')]
+    # Keep temporary segment files out of the real data directory
+    scratch_dir = tempfile.TemporaryDirectory()
+    utils.DATA_DIR = Path(scratch_dir.name)
+
+    with StandInServer(latency=args.latency, segment_count=args.segments) as server:
+        print(f"{args.segments} segments, {args.latency * 1000:.0f} ms latency per request")
+        baseline = None
+        for workers in worker_counts:
+            elapsed = run_once(server, workers)
+            baseline = baseline or elapsed
+            print(f"workers={workers:<3} {elapsed:6.2f}s  speedup x{baseline / elapsed:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark: encode speed and output size of each encoding profile per target format.
+
+Usage: python benchmarks/bench_profiles.py [--formats mp4,webm,mp3,flac] [--profiles fast,balanced,archive]
+                                           [--duration S] [--size WxH] [--output results.json]
+
+A synthetic test pattern with a sine tone is rendered once as FFV1/PCM in
+Matroska, which no target container accepts, so every run re-encodes instead
+of copying streams. Needs ffmpeg and ffprobe on PATH.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import ffmpeg
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import converter
+import utils
+
+FRAME_RATE = 30
+
+
+def make_source(path: Path, duration: float, size: str):
+    """Renders the synthetic input: testsrc2 video and a 440 Hz tone."""
+    video = ffmpeg.input(f"testsrc2=size={size}:rate={FRAME_RATE}:duration={duration}", f='lavfi')
+    audio = ffmpeg.input(f"sine=frequency=440:sample_rate=48000:duration={duration}", f='lavfi')
+    (
+        ffmpeg.output(video, audio, str(path), vcodec='ffv1', acodec='pcm_s16le')
+        .overwrite_output()
+        .run(quiet=True)
+    )
+
+
+def measure(source: Path, out_dir: Path, format: str, profile: str, duration: float) -> dict:
+    """Converts the source once and returns time, speed and size."""
+    file_type = converter.target_file_type(format)
+    output_path = out_dir / f"{profile}.{format}"
+    start, cpu_start = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        ok = converter.convert_media(source, output_path, format, file_type, verbose=False, profile=profile)
+    elapsed = time.perf_counter() - start
+    size = output_path.stat().st_size if ok and output_path.exists() else 0
+    output_path.unlink(missing_ok=True)
+    return {
+        'ok': ok,
+        'seconds': round(elapsed, 3),
+        'fps': round(duration * FRAME_RATE / elapsed, 1) if file_type == 'video' else None,
+        'realtime': round(duration / elapsed, 1),
+        'size_mb': round(size / 1e6, 3),
+        'python_cpu_seconds': round(time.process_time() - cpu_start, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--formats', default='mp4,webm,mp3,flac', help="Comma-separated target formats")
+    parser.add_argument('--profiles', default=','.join(converter.ENCODING_PROFILES),
+                        help="Comma-separated profiles (default: all)")
+    parser.add_argument('--duration', type=float, default=20, help="Length of the synthetic input in seconds")
+    parser.add_argument('--size', default='1280x720', help="Frame size of the synthetic input")
+    parser.add_argument('--output', metavar='FILE', help="Write results as JSON to FILE")
+    args = parser.parse_args()
+
+    formats = [format.strip().lower() for format in args.formats.split(',') if format.strip()]
+    profiles = [profile.strip() for profile in args.profiles.split(',') if profile.strip()]
+    for profile in profiles:
+        if profile not in converter.ENCODING_PROFILES:
+            parser.error(f"unknown profile: {profile}")
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    scratch = Path(scratch_dir.name)
+    utils.DATA_DIR = scratch
+    source = scratch / 'source.mkv'
+    print(f"Rendering {args.duration:g}s {args.size} test input...")
+    make_source(source, args.duration, args.size)
+
+    results = {}
+    print(f"{'Format':<7} {'Profile':<9} {'Status':<6} {'Time':>8} {'fps':>7} {'×realtime':>10} {'Size MB':>9}")
+    for format in formats:
+        for profile in profiles:
+            result = measure(source, scratch, format, profile, args.duration)
+            results.setdefault(format, {})[profile] = result
+            status = "OK" if result['ok'] else "FAILED"
+            fps = f"{result['fps']:.1f}" if result['fps'] is not None else "-"
+            print(f"{format:<7} {profile:<9} {status:<6} {result['seconds']:>7.2f}s {fps:>7} "
+                  f"{result['realtime']:>9.1f}x {result['size_mb']:>9.2f}")
+
+    if args.output:
+        report = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'settings': {'duration': args.duration, 'size': args.size, 'frame_rate': FRAME_RATE},
+            'profiles': {profile: converter.ENCODING_PROFILES[profile] for profile in profiles},
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""Local HTTP stand-in used by the downloader benchmarks.
+
+Serves synthetic direct media, HLS master and media playlists, segments and
+nested iframe pages from memory, with configurable latency, bandwidth and
+error injection, so downloader performance can be measured without touching
+real sites.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Request handler serving synthetic media from the server's settings."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+    def _send_bytes(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self._write_paced(body)
+
+    def _write_paced(self, body: bytes):
+        # Send in blocks, sleeping as needed to stay at the configured bandwidth
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        start = time.monotonic()
+        block_size = 64 * 1024
+        for offset in range(0, len(body), block_size):
+            self.wfile.write(body[offset:offset + block_size])
+            ahead = (offset + block_size) / bandwidth - (time.monotonic() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def _send_stream(self, size: int, content_type: str):
+        # Repeat one block so large files need no memory of their own
+        block = self.server.stream_block
+        start, end = 0, size - 1
+        range_match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        if range_match:
+            start = int(range_match.group(1))
+            end = min(int(range_match.group(2) or size - 1), size - 1)
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', f'"payload-{size}"')
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+
+        position = start
+        while position <= end:
+            offset = position % len(block)
+            piece = block[offset:offset + end - position + 1]
+            self._write_paced(piece)
+            position += len(piece)
+
+    def _route(self):
+        """Returns (kind, handler) for the request path, or (None, None)."""
+        server = self.server
+        path = self.path.split('?', 1)[0]
+        if path == '/hls/master.m3u8':
+            return 'playlist', lambda: self._send_bytes(server.master_playlist().encode(),
+                                                        'application/vnd.apple.mpegurl')
+        if re.fullmatch(r'/hls/(v\d+/)?media\.m3u8', path):
+            return 'playlist', lambda: self._send_bytes(server.media_playlist().encode(),
+                                                        'application/vnd.apple.mpegurl')
+        if re.fullmatch(r'/hls/(v\d+/)?segment_\d+\.ts', path):
+            return 'segment', lambda: self._send_bytes(server.segment_payload, 'video/mp2t')
+        if path == '/files/payload.mp4' and server.direct_size:
+            return 'media', lambda: self._send_stream(server.direct_size, 'video/mp4')
+        page_match = re.fullmatch(r'/page/(\d+)\.html', path)
+        if page_match and int(page_match.group(1)) <= server.iframe_depth:
+            depth = int(page_match.group(1))
+            return 'page', lambda: self._send_bytes(server.iframe_page(depth).encode(), 'text/html; charset=utf-8')
+        return None, None
+
+    def do_HEAD(self):
+        if self.path.split('?', 1)[0] == '/files/payload.mp4' and self.server.direct_size:
+            self._send_stream(self.server.direct_size, 'video/mp4')
+        else:
+            self.send_error(404)
+
+    def do_GET(self):
+        server = self.server
+        if self.path == '/_stats':
+            self._send_bytes(json.dumps(server.stats()).encode(), 'application/json')
+            return
+        if self.path == '/_reset':
+            server.reset_stats()
+            self._send_bytes(b'{}', 'application/json')
+            return
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        kind, handler = self._route()
+        if kind is None:
+            self.send_error(404)
+            return
+        server.record(kind)
+        if kind in ('segment', 'media') and server.should_fail():
+            server.record('injected_error')
+            self.send_error(503)
+            return
+        handler()
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded HTTP server with configurable latency, bandwidth, errors and payload sizes.
+
+    bandwidth is bytes per second for each response (0 for unlimited), and
+    error_rate is the fraction of segment and media requests answered with 503.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, latency: float = 0.05, segment_count: int = 100,
+                 segment_size: int = 64 * 1024, segment_duration: float = 4.0, direct_size: int = 0,
+                 bandwidth: int = 0, error_rate: float = 0.0, iframe_depth: int = 2,
+                 iframe_target: str = 'direct', variants=((800000, 360), (2500000, 720)), seed: int = 0):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.latency = latency
+        self.segment_count = segment_count
+        self.segment_duration = segment_duration
+        self.segment_payload = bytes(range(256)) * (segment_size // 256)
+        self.direct_size = direct_size
+        self.stream_block = bytes(range(256)) * 4096
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.iframe_depth = iframe_depth
+        self.iframe_target = iframe_target
+        self.variants = list(variants)
+        self._random = random.Random(seed)
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, kind: str):
+        with self._stats_lock:
+            self.counts[kind] += 1
+            self.first_seen.setdefault(kind, time.time())
+
+    def should_fail(self) -> bool:
+        with self._stats_lock:
+            return self._random.random() < self.error_rate
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.counts = Counter()
+            self.first_seen = {}
+
+    def stats(self) -> dict:
+        """Request counts by kind and the wall-clock time each kind was first requested."""
+        with self._stats_lock:
+            return {'counts': dict(self.counts), 'first_seen': dict(self.first_seen)}
+
+    def master_playlist(self) -> str:
+        lines = ['#EXTM3U']
+        for i, (bandwidth, height) in enumerate(self.variants):
+            width = height * 16 // 9
+            lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width}x{height}')
+            lines.append(f'v{i}/media.m3u8')
+        return '\n'.join(lines) + '\n'
+
+    def media_playlist(self) -> str:
+        lines = [
+            '#EXTM3U',
+            '#EXT-X-VERSION:3',
+            f'#EXT-X-TARGETDURATION:{int(self.segment_duration)}',
+            '#EXT-X-MEDIA-SEQUENCE:0',
+        ]
+        for i in range(self.segment_count):
+            lines.append(f'#EXTINF:{self.segment_duration:.1f},')
+            lines.append(f'segment_{i:04d}.ts')
+        lines.append('#EXT-X-ENDLIST')
+        return '\n'.join(lines) + '\n'
+
+    def iframe_page(self, depth: int) -> str:
+        """Page at the given nesting depth; the innermost one embeds the media."""
+        if depth < self.iframe_depth:
+            body = f'<iframe src="{self.base_url}/page/{depth + 1}.html"></iframe>'
+        elif self.iframe_target == 'hls':
+            body = f'<video><source src="{self.base_url}/hls/master.m3u8" type="application/x-mpegURL"></video>'
+        else:
+            body = f'<video><source src="{self.base_url}/files/payload.mp4" type="video/mp4"></video>'
+        return f'<html><head><title>Benchmark page {depth}</title></head><body>{body}</body></html>'
+
+    def __enter__(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
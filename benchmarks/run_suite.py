@@ -0,0 +1,183 @@
+"""Benchmark suite: drives the download entry points against a local HTTP/HLS stand-in.
+
+Usage: python benchmarks/run_suite.py [--output results.json] [--compare baseline.json]
+                                      [--latency S] [--bandwidth RATE] [--error-rate F] [--scenarios a,b,...]
+
+Each scenario reports wall time, throughput, time until the first media byte
+was requested, request counts, peak Python memory and CPU time. Results are
+written as JSON so runs from different commits can be compared with --compare.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import downloader
+import ratelimit
+import utils
+from local_server import StandInServer
+
+
+def serve(settings: dict, queue):
+    """Runs the stand-in server until the parent process exits."""
+    with StandInServer(**settings) as server:
+        queue.put(server.base_url)
+        while True:
+            time.sleep(3600)
+
+
+def scenarios(base_url: str) -> dict:
+    """Maps scenario names to callables that download into an output directory."""
+    direct_url = f"{base_url}/files/payload.mp4"
+    return {
+        'direct': lambda out: downloader.download_direct_url(direct_url, out),
+        'direct_segmented': lambda out: downloader.download_direct_url(direct_url, out, connections=4),
+        'handle_download': lambda out: downloader.handle_download(direct_url, out, use_index=False),
+        'hls_media': lambda out: downloader.download_hls_alternative(f"{base_url}/hls/media.m3u8", out, 'bench'),
+        'hls_master': lambda out: downloader.download_hls_alternative(f"{base_url}/hls/master.m3u8", out, 'bench'),
+        'iframe': lambda out: downloader.download_from_iframe(f"{base_url}/page/0.html", out),
+    }
+
+
+def run_scenario(base_url: str, run) -> dict:
+    """Runs one download quietly and collects its metrics."""
+    requests.get(f"{base_url}/_reset")
+    with tempfile.TemporaryDirectory() as out_dir:
+        tracemalloc.start()
+        start_wall, start, cpu_start = time.time(), time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            result = run(Path(out_dir))
+        elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = Path(result).stat().st_size if result and Path(result).is_file() else 0
+
+    stats = requests.get(f"{base_url}/_stats").json()
+    media_times = [stats['first_seen'][kind] for kind in ('media', 'segment') if kind in stats['first_seen']]
+    return {
+        'ok': bool(result),
+        'seconds': round(elapsed, 4),
+        'bytes': size,
+        'throughput_mb_s': round(size / elapsed / 1e6, 2) if elapsed else 0,
+        'time_to_first_media_s': round(min(media_times) - start_wall, 4) if media_times else None,
+        'requests': stats['counts'],
+        'peak_python_mb': round(peak_memory / 1e6, 2),
+        'cpu_seconds': round(cpu, 3),
+    }
+
+
+def best_of(runs: list) -> dict:
+    """Picks the fastest successful run, or the last run if none succeeded."""
+    successful = [run for run in runs if run['ok']]
+    return min(successful, key=lambda run: run['seconds']) if successful else runs[-1]
+
+
+def current_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results: dict, baseline: dict = None):
+    print(f"{'Scenario':<18} {'Status':<6} {'Time':>8} {'MB/s':>9} {'1st media':>10} {'Peak MB':>8} {'CPU s':>7}")
+    for name, result in results.items():
+        status = "OK" if result['ok'] else "FAILED"
+        first_media = result['time_to_first_media_s']
+        first_media = f"{first_media:.3f}s" if first_media is not None else "-"
+        line = (f"{name:<18} {status:<6} {result['seconds']:>7.2f}s {result['throughput_mb_s']:>9.1f} "
+                f"{first_media:>10} {result['peak_python_mb']:>8.1f} {result['cpu_seconds']:>7.2f}")
+        previous = (baseline or {}).get(name)
+        if previous and previous['seconds']:
+            change = (result['seconds'] - previous['seconds']) / previous['seconds'] * 100
+            line += f"  ({change:+.1f}% time vs baseline)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(scenarios('')),
+                        help="Comma-separated scenarios to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per scenario (fastest is reported)")
+    parser.add_argument('--latency', type=float, default=0.02, help="Per-request latency in seconds")
+    parser.add_argument('--bandwidth', type=ratelimit.parse_rate, default=0,
+                        help="Per-response bandwidth, e.g. 20M (default: unlimited)")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of media and segment requests answered with 503")
+    parser.add_argument('--direct-size', type=int, default=256, help="Direct media size in MB")
+    parser.add_argument('--segments', type=int, default=200)
+    parser.add_argument('--segment-size', type=int, default=256 * 1024)
+    parser.add_argument('--iframe-depth', type=int, default=2)
+    parser.add_argument('--iframe-target', choices=('direct', 'hls'), default='direct',
+                        help="Media embedded in the innermost iframe page (hls needs ffmpeg)")
+    parser.add_argument('--output', metavar='FILE', help="Write results as JSON to FILE")
+    parser.add_argument('--compare', metavar='FILE', help="Show time changes against an earlier JSON result")
+    args = parser.parse_args()
+
+    settings = {
+        'latency': args.latency,
+        'bandwidth': args.bandwidth,
+        'error_rate': args.error_rate,
+        'direct_size': args.direct_size * 1024 * 1024,
+        'segment_count': args.segments,
+        'segment_size': args.segment_size,
+        'iframe_depth': args.iframe_depth,
+        'iframe_target': args.iframe_target,
+    }
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    utils.DATA_DIR = Path(scratch_dir.name)
+
+    queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(settings, queue), daemon=True)
+    server.start()
+    base_url = queue.get()
+
+    try:
+        available = scenarios(base_url)
+        results = {}
+        for name in args.scenarios.split(','):
+            if name not in available:
+                parser.error(f"unknown scenario: {name}")
+            results[name] = best_of([run_scenario(base_url, available[name]) for _ in range(args.repeat)])
+    finally:
+        server.terminate()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            'commit': current_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'settings': settings,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,117 @@
 import ffmpeg
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
+from tqdm import tqdm
 import utils
+import probe_cache
+
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma'}
+VIDEO_EXTENSIONS = {'.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v'}
+
+# Description and ffmpeg output options per target format; other formats use ffmpeg's defaults
+AUDIO_FORMAT_SETTINGS = {
+    'mp3': ("High quality MP3 (320k bitrate)", {'acodec': 'libmp3lame', 'audio_bitrate': '320k'}),
+    'wav': ("Uncompressed WAV", {'acodec': 'pcm_s16le'}),
+    'flac': ("Lossless FLAC", {'acodec': 'flac'}),
+    'aac': ("High quality AAC", {'acodec': 'aac', 'audio_bitrate': '256k'}),
+    'm4a': ("AAC in an M4A container", {'acodec': 'aac', 'audio_bitrate': '256k'}),
+    'ogg': ("OGG Vorbis", {'acodec': 'libvorbis'}),
+}
+VIDEO_FORMAT_SETTINGS = {
+    'mp4': ("High quality MP4 with H.264 codec", {'vcodec': 'libx264', 'acodec': 'aac', 'crf': 23}),
+    'mkv': ("MKV (copying streams for speed)", {'vcodec': 'copy', 'acodec': 'copy'}),
+    'webm': ("WebM with VP9 codec", {'vcodec': 'libvpx-vp9', 'acodec': 'libopus', 'crf': 30}),
+    'avi': ("AVI format", {'vcodec': 'libx264', 'acodec': 'mp3'}),
+    'mov': ("MOV with H.264 codec", {'vcodec': 'libx264', 'acodec': 'aac'}),
+}
+AUDIO_TARGET_FORMATS = ('mp3', 'wav', 'flac', 'aac', 'ogg', 'm4a')
+
+# Encoder speed knobs per profile, added to the format settings for whichever encoders they use.
+# fast favours encode speed, archive favours compression; quality targets (crf, bitrate) stay per format.
+# libvorbis (OGG) and PCM (WAV) have no speed settings, so they encode the same under every profile.
+ENCODING_PROFILES = {
+    'fast': {
+        'libx264': {'preset': 'veryfast'},
+        'libvpx-vp9': {'deadline': 'realtime', 'cpu-used': 8, 'row-mt': 1, 'tile-columns': 2, 'video_bitrate': 0},
+        'libmp3lame': {'compression_level:a': 7},
+        'flac': {'compression_level:a': 0},
+        'aac': {'aac_coder': 'fast'},
+        'libopus': {'compression_level:a': 5},
+    },
+    'balanced': {
+        'libx264': {'preset': 'medium'},
+        'libvpx-vp9': {'deadline': 'good', 'cpu-used': 4, 'row-mt': 1, 'tile-columns': 2, 'video_bitrate': 0},
+        'libmp3lame': {'compression_level:a': 5},
+        'flac': {'compression_level:a': 5},
+        'aac': {'aac_coder': 'twoloop'},
+        'libopus': {'compression_level:a': 10},
+    },
+    'archive': {
+        'libx264': {'preset': 'slow', 'tune': 'film'},
+        'libvpx-vp9': {'deadline': 'good', 'cpu-used': 1, 'row-mt': 1, 'tile-columns': 1, 'video_bitrate': 0},
+        'libmp3lame': {'compression_level:a': 0},
+        'flac': {'compression_level:a': 8},
+        'aac': {'aac_coder': 'twoloop'},
+        'libopus': {'compression_level:a': 10},
+    },
+}
+# Encoder names that share another encoder's profile knobs
+ENCODER_ALIASES = {'mp3': 'libmp3lame'}
+DEFAULT_PROFILE = 'balanced'
+# libvpx only spreads work over threads it is given (it uses at most 16)
+VP9_THREADS = min(os.cpu_count() or 1, 16)
+
+# Output options that configure the audio encoder; everything else applies to video
+AUDIO_OPTION_KEYS = {'acodec', 'audio_bitrate', 'compression_level:a', 'aac_coder'}
+
+# Codecs (as reported by ffprobe) each target container can hold without re-encoding.
+# None means the container accepts any codec of that kind.
+CONTAINER_CODECS = {
+    'mp4': {'video': {'h264', 'hevc', 'mpeg4', 'av1'}, 'audio': {'aac', 'mp3', 'alac', 'ac3', 'eac3'},
+            'subtitle': {'mov_text'}},
+    'm4v': {'video': {'h264', 'hevc', 'mpeg4'}, 'audio': {'aac', 'mp3', 'alac', 'ac3'}, 'subtitle': {'mov_text'}},
+    'mov': {'video': {'h264', 'hevc', 'mpeg4', 'prores', 'mjpeg'}, 'audio': {'aac', 'mp3', 'alac', 'ac3', 'pcm_s16le', 'pcm_s24le'},
+            'subtitle': {'mov_text'}},
+    'mkv': {'video': None, 'audio': None,
+            'subtitle': {'subrip', 'ass', 'ssa', 'webvtt', 'hdmv_pgs_subtitle', 'dvd_subtitle', 'dvb_subtitle'}},
+    'webm': {'video': {'vp8', 'vp9', 'av1'}, 'audio': {'opus', 'vorbis'}, 'subtitle': {'webvtt'}},
+    'avi': {'video': {'h264', 'mpeg4', 'mjpeg', 'msmpeg4v3'}, 'audio': {'mp3', 'ac3', 'pcm_s16le'}},
+    'mp3': {'audio': {'mp3'}},
+    'aac': {'audio': {'aac'}},
+    'm4a': {'audio': {'aac', 'alac'}},
+    'flac': {'audio': {'flac'}},
+    'wav': {'audio': {'pcm_s16le', 'pcm_s24le', 'pcm_f32le', 'pcm_u8'}},
+    'ogg': {'audio': {'vorbis', 'opus', 'flac'}},
+}
+
+# Text subtitles that do not fit a container are converted to its text format;
+# image-based ones (PGS, DVD) cannot be and are left out
+TEXT_SUBTITLE_CODECS = {'subrip', 'ass', 'ssa', 'webvtt', 'mov_text', 'text'}
+SUBTITLE_ENCODERS = {'mp4': 'mov_text', 'm4v': 'mov_text', 'mov': 'mov_text', 'mkv': 'srt', 'webm': 'webvtt'}
+
+# Estimated CPU cores each kind of conversion keeps busy, used to schedule batch jobs.
+# Video formats without an explicit codec fall back to ffmpeg's default (usually x264).
+CODEC_COSTS = {'copy': 0.25, 'libx264': 4, 'libvpx-vp9': 4}
+DEFAULT_VIDEO_COST = 4
+AUDIO_COST = 1
+# Total cost that may run at once during batch conversion
+CONVERT_CPU_BUDGET = os.cpu_count() or 1
+# Seconds the file list waits for background probes before showing what is known
+LISTING_PROBE_WAIT = 1.0
+# Lines of ffmpeg's log kept for error reports
+FFMPEG_STDERR_LINES = 200
+# Chunked encoding: videos at least this long (seconds) are split at keyframes and
+# the pieces encoded in parallel, each piece covering at least CHUNK_MIN_DURATION
+CHUNKED_ENCODE_MIN_DURATION = 10 * 60
+CHUNK_MIN_DURATION = 60
+CHUNKED_ENCODERS = {'libx264', 'libvpx-vp9'}
 
 def list_downloaded_files(download_base_path: Path) -> list:
     """Finds all files in the download directory and its subdirectories."""
@@ -13,14 +124,10 @@ def list_downloaded_files(download_base_path: Path) -> list:
 
 def list_files_by_type(download_base_path: Path, convert_base_path: Path, file_type: str) -> list:
     """Finds files in both download and convert directories filtered by type (audio or video)."""
-    # Define file extensions for different types
-    audio_extensions = {'.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma'}
-    video_extensions = {'.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v'}
-    
     if file_type == 'audio':
-        target_extensions = audio_extensions
+        target_extensions = AUDIO_EXTENSIONS
     elif file_type == 'video':
-        target_extensions = video_extensions
+        target_extensions = VIDEO_EXTENSIONS
     else:
         return []
     
@@ -50,126 +157,437 @@ def list_files_by_type(download_base_path: Path, convert_base_path: Path, file_t
     
     return sorted(filtered_files, key=lambda x: x.name.lower())
 
-def convert_media(input_path: Path, output_path: Path, format: str, file_type: str):
-    """Converts a media file to the specified format using ffmpeg with progress indication."""
-    print(f"\nConverting {input_path.name} to {format.upper()}...")
-    print(f"Output will be saved to: {output_path}")
-    print("⏳ Starting conversion process...")
+def output_settings(format: str, file_type: str, profile: str = None):
+    """Returns (description, ffmpeg output options) for a target format.
+
+    The encoder knobs of the given encoding profile (DEFAULT_PROFILE if None)
+    are added for the encoders the format uses.
+    """
+    table = AUDIO_FORMAT_SETTINGS if file_type == 'audio' else VIDEO_FORMAT_SETTINGS
+    description, options = table.get(format, (f"{format.upper()} format", {}))
+    knobs = ENCODING_PROFILES[profile or DEFAULT_PROFILE]
+    options = dict(options)
+    for codec_key in ('vcodec', 'acodec'):
+        codec = options.get(codec_key)
+        options.update(knobs.get(ENCODER_ALIASES.get(codec, codec), {}))
+    if options.get('vcodec') == 'libvpx-vp9':
+        options.setdefault('threads', VP9_THREADS)
+    return description, options
+
+def _drain_stderr(pipe, lines: deque):
+    """Reads ffmpeg's log into a bounded buffer so it never piles up in memory."""
+    for line in iter(pipe.readline, b''):
+        lines.append(line)
+    pipe.close()
+
+def _run_ffmpeg(stream_spec, duration: float = None, desc: str = None, show_progress: bool = True,
+                on_progress=None):
+    """Runs an ffmpeg command, following its -progress output on a tqdm bar.
+
+    The bar shows percent of duration (when known), encode speed relative to
+    realtime, fps and ETA. With on_progress, the encoded position in seconds
+    is passed to that callback instead of drawing a bar. Only the last
+    FFMPEG_STDERR_LINES lines of ffmpeg's log are kept; they become the
+    stderr of the ffmpeg.Error raised on failure.
+    """
+    process = (
+        stream_spec
+        .global_args('-progress', 'pipe:1', '-nostats')
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    stderr_lines = deque(maxlen=FFMPEG_STDERR_LINES)
+    stderr_thread = threading.Thread(target=_drain_stderr, args=(process.stderr, stderr_lines), daemon=True)
+    stderr_thread.start()
+
+    total = round(duration, 1) if duration else None
+    with tqdm(total=total, unit='s', desc=desc, disable=not show_progress or on_progress is not None,
+              bar_format='{l_bar}{bar}| {n:.0f}/{total_fmt}s [{elapsed}<{remaining}{postfix}]') as pbar:
+        block = {}
+        for raw_line in iter(process.stdout.readline, b''):
+            key, _, value = raw_line.decode(errors='replace').strip().partition('=')
+            if key != 'progress':
+                block[key] = value
+                continue
+            # One progress block ends with progress=continue or progress=end
+            out_time = block.get('out_time_us') or block.get('out_time_ms')
+            if out_time and out_time.lstrip('-').isdigit():
+                position = max(0.0, int(out_time) / 1_000_000)
+                if total:
+                    position = min(position, total)
+                pbar.update(position - pbar.n)
+                if on_progress:
+                    on_progress(position)
+            postfix = {}
+            if block.get('speed', 'N/A') != 'N/A':
+                postfix['speed'] = block['speed'].strip()
+            if block.get('fps', '0') not in ('0', '0.00', 'N/A'):
+                postfix['fps'] = block['fps']
+            if postfix:
+                pbar.set_postfix(postfix, refresh=False)
+            block = {}
+        process.stdout.close()
+
+    returncode = process.wait()
+    stderr_thread.join()
+    if returncode != 0:
+        raise ffmpeg.Error('ffmpeg', b'', b''.join(stderr_lines))
+
+def _streams_of_kind(probe: dict, codec_type: str):
+    """Yields (specifier, stream) for every stream of a kind, skipping cover art."""
+    position = 0
+    for stream in probe.get('streams', []):
+        if stream.get('codec_type') != codec_type:
+            continue
+        if not stream.get('disposition', {}).get('attached_pic'):
+            yield f"{codec_type[0]}:{position}", stream
+        position += 1
+
+def _pick_stream(probe: dict, codec_type: str):
+    """Returns (specifier, stream) for the first stream of a kind, skipping cover art, or (None, None)."""
+    return next(_streams_of_kind(probe, codec_type), (None, None))
+
+def _plan_subtitles(probe: dict, format: str, plan: dict, details: list):
+    """Adds the subtitle streams the target container can hold to a plan.
+
+    Subtitles in a codec the container accepts are copied, other text
+    subtitles are converted to its text format, and image-based ones that do
+    not fit are left out. Codecs are set per output stream (c:s:N).
+    """
+    allowed = CONTAINER_CODECS.get(format, {}).get('subtitle')
+    if not allowed:
+        return
+    dropped = 0
+    for specifier, stream in _streams_of_kind(probe, 'subtitle'):
+        codec = stream.get('codec_name', 'unknown')
+        if codec in allowed:
+            target = 'copy'
+        elif codec in TEXT_SUBTITLE_CODECS:
+            target = SUBTITLE_ENCODERS[format]
+        else:
+            dropped += 1
+            continue
+        plan['options'][f"c:s:{len(plan['subtitles'])}"] = target
+        plan['subtitles'].append(specifier)
+        plan['streams'].append(specifier)
+        details.append(f"subtitle {codec} → {target}")
+    if dropped:
+        details.append(f"{dropped} image subtitle(s) dropped")
+
+def plan_conversion(input_path: Path, format: str, file_type: str, probe: dict = None, profile: str = None):
+    """Decides per stream whether a conversion can copy it or has to re-encode it.
+
+    Streams whose codec the target container accepts are copied (remux);
+    only the others are encoded with the target format's settings. Audio
+    targets keep just the audio stream, and encoders get the knobs of the
+    encoding profile. Video targets also keep the subtitles the container can
+    hold, a pure remux keeps every further audio and video track that fits,
+    and chapters are always carried over. Returns a plan dict with the mapped
+    streams, ffmpeg output options and a readable summary, or None when the
+    input cannot be probed.
+    """
+    if probe is None:
+        probe = probe_cache.get_probe(input_path)
+        if probe is None:
+            return None
+
+    _, settings = output_settings(format, file_type, profile)
+    container = CONTAINER_CODECS.get(format, {})
+    kinds = ['audio'] if file_type == 'audio' else ['video', 'audio']
+    plan = {'streams': [], 'specifiers': {}, 'subtitles': [], 'options': {}, 'actions': {}}
+    details = []
+
+    for kind in kinds:
+        specifier, stream = _pick_stream(probe, kind)
+        if stream is None:
+            continue
+        codec = stream.get('codec_name', 'unknown')
+        stream_options = {key: value for key, value in settings.items()
+                          if (key in AUDIO_OPTION_KEYS) == (kind == 'audio')}
+        codec_key = 'acodec' if kind == 'audio' else 'vcodec'
+        allowed = container.get(kind, set()) if container else set()
+        if kind in container and (allowed is None or codec in allowed):
+            plan['options'][codec_key] = 'copy'
+            plan['actions'][kind] = 'copy'
+            details.append(f"{kind} {codec} → copy")
+        else:
+            if stream_options.get(codec_key) == 'copy':
+                # The format's default is a copy, but this codec does not fit the container
+                del stream_options[codec_key]
+            plan['options'].update(stream_options)
+            plan['actions'][kind] = 'encode'
+            details.append(f"{kind} {codec} → {stream_options.get(codec_key, 'default encoder')}")
+        plan['streams'].append(specifier)
+        plan['specifiers'][kind] = specifier
+
+    if not plan['streams']:
+        return None
+    actions = set(plan['actions'].values())
+    path = 'remux' if actions == {'copy'} else ('re-encode' if actions == {'encode'} else 'partial re-encode')
+    if file_type == 'video':
+        if path == 'remux':
+            # Nothing is decoded, so extra tracks (other languages, angles) cost nothing to keep
+            for kind in kinds:
+                allowed = container.get(kind)
+                extra = [specifier for specifier, stream in _streams_of_kind(probe, kind)
+                         if specifier != plan['specifiers'].get(kind)
+                         and (allowed is None or stream.get('codec_name') in allowed)]
+                plan['streams'].extend(extra)
+                if extra:
+                    details.append(f"{len(extra)} more {kind} track(s) → copy")
+        _plan_subtitles(probe, format, plan, details)
+    plan['options']['map_chapters'] = 0
+    plan['path'] = path
+    plan['summary'] = f"{path} ({', '.join(details)})"
+    return plan
+
+def chunk_count(duration: float, cpu_count: int = None) -> int:
+    """Number of pieces for a chunked encode: one per core, but none shorter than CHUNK_MIN_DURATION."""
+    if not duration or duration < CHUNKED_ENCODE_MIN_DURATION:
+        return 1
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, min(cpu_count, int(duration // CHUNK_MIN_DURATION)))
+
+def _concat_list_line(path: Path) -> str:
+    # The concat demuxer quotes paths with single quotes
+    escaped = str(path).replace("'", "'\\''")
+    return f"file '{escaped}'\n"
+
+def _convert_chunked(input_path: Path, output_path: Path, plan: dict, probe: dict, duration: float,
+                     chunks: int, verbose: bool = True):
+    """Encodes the video in parallel pieces split at keyframes and joins them without re-encoding.
+
+    The video stream is first copied into pieces by the segment muxer, which
+    cuts on the first keyframe after each boundary. Each piece is encoded by
+    its own ffmpeg process, and the encoded pieces are concatenated with
+    stream copy. Audio is taken once from the original input in that final
+    step (copied or encoded per the plan), offset to keep its original sync,
+    together with the subtitles and chapters.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    cpu_count = os.cpu_count() or 1
+    threads = max(1, cpu_count // chunks)
+    video_options = {key: value for key, value in plan['options'].items()
+                     if key not in AUDIO_OPTION_KEYS and not key.startswith('c:s:') and key != 'map_chapters'}
+    # Audio, subtitles and chapters are taken from the original input when joining
+    join_options = {key: value for key, value in plan['options'].items() if key not in video_options}
+
+    temp_dir = utils.DATA_DIR / 'temp'
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix='chunked_encode_', dir=temp_dir))
+    try:
+        # Step 1: split the video stream at keyframes (stream copy, fast)
+        log(f"✂️  Splitting video into {chunks} pieces at keyframes...")
+        boundaries = ','.join(f"{duration * i / chunks:.3f}" for i in range(1, chunks))
+        _run_ffmpeg(
+            ffmpeg.input(str(input_path))[plan['specifiers']['video']]
+            .output(str(work_dir / 'source_%04d.mkv'), c='copy', f='segment',
+                    segment_times=boundaries, reset_timestamps=1),
+            show_progress=False
+        )
+        sources = sorted(work_dir.glob('source_*.mkv'))
+        if not sources:
+            raise ffmpeg.Error('ffmpeg', b'', b'Splitting the video produced no pieces')
+
+        # Step 2: encode every piece at the same time on one combined progress bar
+        log(f"⚙️  Encoding {len(sources)} pieces in parallel ({threads} thread(s) each)...")
+        positions = [0.0] * len(sources)
+        progress_lock = threading.Lock()
+        with tqdm(total=round(duration, 1), unit='s', desc=output_path.name[:40], disable=not verbose,
+                  bar_format='{l_bar}{bar}| {n:.0f}/{total_fmt}s [{elapsed}<{remaining}, {rate_fmt}]') as pbar:
+            def encode_piece(index: int, source: Path) -> Path:
+                def on_progress(position: float):
+                    with progress_lock:
+                        positions[index] = position
+                        pbar.update(min(sum(positions), pbar.total) - pbar.n)
+                encoded = work_dir / f"encoded_{index:04d}.mkv"
+                _run_ffmpeg(ffmpeg.input(str(source)).output(str(encoded), y=None, **dict(video_options, threads=threads)),
+                            on_progress=on_progress)
+                return encoded
+
+            with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+                encoded_pieces = list(executor.map(encode_piece, range(len(sources)), sources))
+
+        # Step 3: join the pieces losslessly and add the audio once
+        log("🔗 Joining pieces...")
+        concat_list = work_dir / 'pieces.txt'
+        with open(concat_list, 'w', encoding='utf-8') as f:
+            f.writelines(_concat_list_line(piece) for piece in encoded_pieces)
+        streams = [ffmpeg.input(str(concat_list), f='concat', safe=0)['v:0']]
+        video_stream = _pick_stream(probe, 'video')[1] or {}
+        audio_stream = _pick_stream(probe, 'audio')[1] or {}
+        offset = float(audio_stream.get('start_time', 0) or 0) - float(video_stream.get('start_time', 0) or 0)
+        source_input = ffmpeg.input(str(input_path), itsoffset=f"{offset:.6f}") if abs(offset) > 0.001 \
+            else ffmpeg.input(str(input_path))
+        if 'audio' in plan['specifiers']:
+            streams.append(source_input[plan['specifiers']['audio']])
+        streams.extend(source_input[specifier] for specifier in plan['subtitles'])
+        if len(streams) > 1:
+            # The original input is the second one, after the concat list
+            join_options['map_chapters'] = 1
+        else:
+            join_options.pop('map_chapters', None)
+        _run_ffmpeg(ffmpeg.output(*streams, str(output_path), y=None, vcodec='copy', **join_options),
+                    duration, desc="Joining", show_progress=verbose)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def convert_media(input_path: Path, output_path: Path, format: str, file_type: str,
+                  threads: int = None, verbose: bool = True, plan: dict = None, profile: str = None) -> bool:
+    """Converts a media file to the specified format using ffmpeg with progress indication.
+
+    The input is probed and plan_conversion picks stream copies wherever the
+    target container allows them (a precomputed plan may be passed in).
+    profile names an entry of ENCODING_PROFILES (DEFAULT_PROFILE if None).
+    threads caps the encoder threads (used by batch conversion to share the CPU),
+    and verbose=False keeps the output to errors only. Returns True on success.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    log(f"\nConverting {input_path.name} to {format.upper()}...")
+    log(f"Output will be saved to: {output_path}")
+    log("⏳ Starting conversion process...")
     
     try:
-        # Get input file info for progress estimation
-        try:
-            probe = ffmpeg.probe(str(input_path))
-            duration = float(probe['streams'][0]['duration'])
-            print(f"📊 Input file duration: {duration:.1f} seconds")
-        except:
-            duration = None
-            print("📊 Unable to determine file duration")
+        # Get input file info for progress estimation and stream planning
+        probe = probe_cache.get_probe(input_path)
+        duration = probe_cache.probe_duration(probe)
+        if duration:
+            log(f"📊 Input file duration: {duration:.1f} seconds")
+        else:
+            log("📊 Unable to determine file duration")
+        if plan is None and probe is not None:
+            plan = plan_conversion(input_path, format, file_type, probe, profile)
         
-        print("🔄 Processing... Please wait, this may take a while depending on file size and format.")
+        log("🔄 Processing... Please wait, this may take a while depending on file size and format.")
         
         # Build the ffmpeg command with appropriate settings
         if file_type == 'audio':
-            print("🎵 Converting audio file...")
-            # Audio conversion with quality settings
-            if format in ['mp3']:
-                print("🎯 Target: High quality MP3 (320k bitrate)")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), acodec='libmp3lame', audio_bitrate='320k', y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-            elif format in ['wav']:
-                print("🎯 Target: Uncompressed WAV")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), acodec='pcm_s16le', y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-            elif format in ['flac']:
-                print("🎯 Target: Lossless FLAC")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), acodec='flac', y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-            elif format in ['aac']:
-                print("🎯 Target: High quality AAC")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), acodec='aac', audio_bitrate='256k', y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-            else:
-                print(f"🎯 Target: {format.upper()} format")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
+            log("🎵 Converting audio file...")
         else:
-            print("🎬 Converting video file...")
-            # Video conversion
-            if format in ['mp4']:
-                print("🎯 Target: High quality MP4 with H.264 codec")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), vcodec='libx264', acodec='aac', crf=23, y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-            elif format in ['mkv']:
-                print("🎯 Target: MKV (copying streams for speed)")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), vcodec='copy', acodec='copy', y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-            elif format in ['webm']:
-                print("🎯 Target: WebM with VP9 codec")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), vcodec='libvpx-vp9', acodec='libopus', crf=30, y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-            elif format in ['avi']:
-                print("🎯 Target: AVI format")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), vcodec='libx264', acodec='mp3', y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-            else:
-                print(f"🎯 Target: {format.upper()} format")
-                (
-                    ffmpeg
-                    .input(str(input_path))
-                    .output(str(output_path), y=None)
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
+            log("🎬 Converting video file...")
+        description, options = output_settings(format, file_type, profile)
+        log(f"🎯 Target: {description} ({profile or DEFAULT_PROFILE} profile)")
+        input_stream = ffmpeg.input(str(input_path))
+        if plan:
+            log(f"🧭 Path: {plan['summary']}")
+            streams = [input_stream[specifier] for specifier in plan['streams']]
+            options = plan['options']
+        else:
+            # Without probe data, fall back to the format's fixed settings
+            streams = [input_stream]
+        if threads and (not plan or plan['actions'].get('video') == 'encode'):
+            options = dict(options, threads=threads)
         
-        print("✅ Conversion successful!")
+        # Long encodes with a single-process encoder run as parallel chunks,
+        # unless a thread cap says the CPU is shared with other jobs
+        chunks = chunk_count(duration)
+        if (not threads and chunks > 1 and plan and plan['actions'].get('video') == 'encode'
+                and plan['options'].get('vcodec') in CHUNKED_ENCODERS):
+            log(f"🧩 Chunked encode: {chunks} pieces for {probe_cache.format_duration(duration)} of video")
+            _convert_chunked(input_path, output_path, plan, probe, duration, chunks, verbose)
+        else:
+            _run_ffmpeg(
+                ffmpeg.output(*streams, str(output_path), y=None, **options),
+                duration, desc=output_path.name[:40], show_progress=verbose
+            )
+        
+        log("✅ Conversion successful!")
         
         # Show output file info
         try:
             output_size = output_path.stat().st_size / (1024 * 1024)
-            print(f"📁 Output file size: {output_size:.1f} MB")
+            log(f"📁 Output file size: {output_size:.1f} MB")
         except:
             pass
+        return True
 
     except ffmpeg.Error as e:
-        print("❌ Conversion failed.")
+        print(f"❌ Conversion of {input_path.name} failed.")
         print("FFmpeg Error:", e.stderr.decode())
     except Exception as e:
-        print(f"❌ Unexpected error during conversion: {e}")
+        print(f"❌ Unexpected error during conversion of {input_path.name}: {e}")
+    return False
+
+def convert_media_multi(input_path: Path, targets: list, verbose: bool = True, profile: str = None) -> bool:
+    """Converts one input to several formats in a single ffmpeg run, decoding it only once.
+
+    targets is a list of (output_path, format, file_type). Each target gets the
+    same plan (stream copies and format settings) as convert_media would use.
+    Streams that several targets re-encode are decoded once and fanned out with
+    split/asplit filters; copied streams are mapped directly. Returns True if
+    every output was written.
+    """
+    if len(targets) == 1:
+        return convert_media(input_path, *targets[0], verbose=verbose, profile=profile)
+
+    log = print if verbose else (lambda *args, **kwargs: None)
+    names = ', '.join(output_path.name for output_path, _, _ in targets)
+    log(f"\nConverting {input_path.name} to {len(targets)} formats in one pass...")
+    log(f"Outputs: {names}")
+    
+    try:
+        probe = probe_cache.get_probe(input_path)
+        duration = probe_cache.probe_duration(probe)
+        if duration:
+            log(f"📊 Input file duration: {duration:.1f} seconds")
+        else:
+            log("📊 Unable to determine file duration")
+
+        plans = []
+        for output_path, format, file_type in targets:
+            description, options = output_settings(format, file_type, profile)
+            plan = plan_conversion(input_path, format, file_type, probe, profile) if probe is not None else None
+            log(f"🎯 {output_path.name}: {description}" + (f" — {plan['summary']}" if plan else ""))
+            plans.append(plan)
+
+        # Count how many outputs decode each input stream, so shared decodes can be split
+        input_stream = ffmpeg.input(str(input_path))
+        encoders = {}
+        for plan in plans:
+            for kind, specifier in (plan or {}).get('specifiers', {}).items():
+                if plan['actions'][kind] == 'encode':
+                    encoders[specifier] = encoders.get(specifier, 0) + 1
+        decoded = {}
+        for specifier, count in encoders.items():
+            if count > 1:
+                split_filter = 'asplit' if specifier.startswith('a') else 'split'
+                branches = input_stream[specifier].filter_multi_output(split_filter, count)
+                decoded[specifier] = iter([branches.stream(i) for i in range(count)])
+
+        outputs = []
+        for (output_path, format, file_type), plan in zip(targets, plans):
+            if plan:
+                streams = []
+                encoded = {specifier for kind, specifier in plan['specifiers'].items()
+                           if plan['actions'][kind] == 'encode'}
+                for specifier in plan['streams']:
+                    if specifier in encoded and specifier in decoded:
+                        streams.append(next(decoded[specifier]))
+                    else:
+                        streams.append(input_stream[specifier])
+                options = plan['options']
+            else:
+                # Without probe data, fall back to the format's fixed settings
+                streams = [input_stream]
+                _, options = output_settings(format, file_type, profile)
+            outputs.append(ffmpeg.output(*streams, str(output_path), y=None, **options))
+
+        log("🔄 Processing... Please wait, this may take a while depending on file size and format.")
+        _run_ffmpeg(ffmpeg.merge_outputs(*outputs), duration, desc=input_path.name[:40], show_progress=verbose)
+        
+        log("✅ Conversion successful!")
+        for output_path, _, _ in targets:
+            try:
+                log(f"📁 {output_path.name}: {output_path.stat().st_size / (1024 * 1024):.1f} MB")
+            except OSError:
+                pass
+        return True
+
+    except ffmpeg.Error as e:
+        print(f"❌ Conversion of {input_path.name} failed.")
+        print("FFmpeg Error:", e.stderr.decode())
+    except Exception as e:
+        print(f"❌ Unexpected error during conversion of {input_path.name}: {e}")
+    return False
 
 def select_file_type():
     """Shows menu to select between audio and video files."""
@@ -186,8 +604,12 @@ def select_file_type():
         else:
             print("Invalid selection. Please enter 1 or 2.")
 
-def select_target_format(file_type: str, source_format: str):
-    """Shows format selection based on file type."""
+def select_target_format(file_type: str, source_format: str, multiple: bool = False):
+    """Shows format selection based on file type.
+
+    Returns (format, output file type), or with multiple=True a list of them
+    picked as comma-separated numbers.
+    """
     print(f"\n--- Select Target Format ---")
     
     if file_type == 'audio':
@@ -196,13 +618,15 @@ def select_target_format(file_type: str, source_format: str):
             '2': 'wav', 
             '3': 'flac',
             '4': 'aac',
-            '5': 'ogg'
+            '5': 'ogg',
+            '6': 'm4a'
         }
         print("1: MP3 (Compressed, widely supported)")
         print("2: WAV (Uncompressed, high quality)")
         print("3: FLAC (Lossless compression)")
         print("4: AAC (High quality, Apple devices)")
         print("5: OGG (Open source format)")
+        print("6: M4A (AAC, copied without re-encoding when possible)")
         
     else:  # video
         formats = {
@@ -223,20 +647,44 @@ def select_target_format(file_type: str, source_format: str):
         print("\n--- Extract Audio ---")
         print("6: Extract to MP3")
         print("7: Extract to WAV")
-        formats.update({'6': 'mp3', '7': 'wav'})
+        print("8: Extract to M4A (copies AAC audio without re-encoding)")
+        formats.update({'6': 'mp3', '7': 'wav', '8': 'm4a'})
+    
+    def selection(format_choice):
+        # Check if we're extracting audio from video
+        if file_type == 'video' and format_choice in ['6', '7', '8']:
+            return formats[format_choice], 'audio'  # Return format and new type
+        return formats[format_choice], file_type  # Return format and same type
     
     while True:
-        format_choice = input("> Select a format number: ").strip()
-        if format_choice in formats:
-            selected_format = formats[format_choice]
-            
-            # Check if we're extracting audio from video
-            if file_type == 'video' and format_choice in ['6', '7']:
-                return selected_format, 'audio'  # Return format and new type
-            else:
-                return selected_format, file_type  # Return format and same type
+        if multiple:
+            choices = input("> Select format number(s), comma-separated for several (e.g. 1,5): ").split(',')
+            choices = list(dict.fromkeys(choice.strip() for choice in choices if choice.strip()))
+            if choices and all(choice in formats for choice in choices):
+                selected = [selection(choice) for choice in choices]
+                # Two menu entries can name the same format (e.g. MP3 audio and extraction)
+                return list(dict.fromkeys(selected))
         else:
-            print("Invalid format selection.")
+            format_choice = input("> Select a format number: ").strip()
+            if format_choice in formats:
+                return selection(format_choice)
+        print("Invalid format selection.")
+
+def select_encoding_profile():
+    """Shows menu to pick an encoding speed profile."""
+    print("\n--- Select Encoding Profile ---")
+    print("1: Fast (quickest encodes, larger files)")
+    print("2: Balanced (good speed and size, default)")
+    print("3: Archive (slowest, smallest files)")
+    profiles = {'1': 'fast', '2': 'balanced', '3': 'archive'}
+    
+    while True:
+        choice = input("> Select profile (1-3, Enter for balanced): ").strip()
+        if not choice:
+            return DEFAULT_PROFILE
+        if choice in profiles:
+            return profiles[choice]
+        print("Invalid selection. Please enter 1, 2 or 3.")
 
 def run_conversion_menu():
     """Shows an enhanced menu to select media type, file, and format for conversion."""
@@ -258,6 +706,12 @@ def run_conversion_menu():
     print(f"\n--- Select a {file_type.title()} File to Convert ---")
     print(f"📂 Found {len(files_to_convert)} {file_type} file(s):")
     
+    # Probe new files in the background; cached ones are shown right away
+    probing = probe_cache.prefetch(files_to_convert)
+    if probing:
+        wait(probing.values(), timeout=LISTING_PROBE_WAIT)
+    probes = probe_cache.cached_probes(files_to_convert)
+    
     for i, file_path in enumerate(files_to_convert):
         # Show relative path and file size for better overview
         try:
@@ -271,7 +725,8 @@ def run_conversion_menu():
                 relative_path = file_path.relative_to(utils.CONVERT_DIR_BASE)
                 source_dir = "🔄 convert"
             
-            print(f"{i + 1}: {relative_path} ({file_size:.1f} MB) [{source_dir}]")
+            media_info = probe_cache.describe(probes[file_path]) or "probing..."
+            print(f"{i + 1}: {relative_path} ({file_size:.1f} MB) [{source_dir}] {media_info}")
         except Exception as e:
             print(f"{i + 1}: {file_path.name} [error reading file info]")
 
@@ -292,17 +747,23 @@ def run_conversion_menu():
     print(f"📋 Current format: {source_format.upper()}")
     print(f"📋 File location: {selected_file.parent}")
     
-    target_format, output_type = select_target_format(file_type, source_format)
+    selected_formats = select_target_format(file_type, source_format, multiple=True)
+    profile = select_encoding_profile()
     
     # Step 5: Prepare for conversion
-    output_filename = f"{selected_file.stem}.{target_format}"
-    safe_output_filename = utils.sanitize_filename(output_filename)
-    output_path = daily_convert_path / safe_output_filename
+    daily_convert_path.mkdir(parents=True, exist_ok=True)
+    targets = []
+    for target_format, output_type in selected_formats:
+        output_filename = f"{selected_file.stem}.{target_format}"
+        safe_output_filename = utils.sanitize_filename(output_filename)
+        targets.append((daily_convert_path / safe_output_filename, target_format, output_type))
     
-    # Check if output file already exists
-    if output_path.exists():
-        print(f"\n⚠️  Output file already exists: {output_path}")
-        overwrite = input("Do you want to overwrite it? (y/N): ").lower().strip()
+    # Check if output files already exist
+    existing = [output_path for output_path, _, _ in targets if output_path.exists()]
+    if existing:
+        for output_path in existing:
+            print(f"\n⚠️  Output file already exists: {output_path}")
+        overwrite = input(f"Do you want to overwrite {'it' if len(existing) == 1 else 'them'}? (y/N): ").lower().strip()
         if overwrite not in ['y', 'yes']:
             print("❌ Conversion cancelled.")
             input("Press Enter to return to the main menu.")
@@ -310,12 +771,235 @@ def run_conversion_menu():
     
     print(f"\n🚀 Starting conversion process...")
     print(f"📤 Input:  {selected_file}")
-    print(f"📥 Output: {output_path}")
+    for output_path, _, _ in targets:
+        print(f"📥 Output: {output_path}")
     
-    # Step 6: Convert
-    convert_media(selected_file, output_path, target_format, output_type)
+    # Step 6: Convert (several formats share one decode of the input)
+    convert_media_multi(selected_file, targets, profile=profile)
     
     print(f"\n🎉 Conversion completed!")
-    print(f"📂 You can find your converted file at: {output_path}")
+    print(f"📂 You can find your converted file(s) in: {daily_convert_path}")
     
-    input("\nPress Enter to return to the main menu.")
\ No newline at end of file
+    input("\nPress Enter to return to the main menu.")
+
+
+### Batch conversion
+
+def conversion_cost(format: str, file_type: str, cpu_budget: float = None, plan: dict = None) -> float:
+    """Estimates how many cores one conversion keeps busy, capped at the CPU budget.
+
+    With a plan from plan_conversion the estimate follows what will actually
+    run, so a remux is cheap even when the format normally re-encodes.
+    """
+    cpu_budget = cpu_budget or CONVERT_CPU_BUDGET
+    _, options = output_settings(format, file_type)
+    if plan:
+        if plan['actions'].get('video') == 'encode':
+            cost = CODEC_COSTS.get(plan['options'].get('vcodec'), DEFAULT_VIDEO_COST)
+        elif plan['actions'].get('audio') == 'encode':
+            cost = AUDIO_COST
+        else:
+            cost = CODEC_COSTS['copy']
+    elif file_type == 'audio':
+        cost = CODEC_COSTS['copy'] if options.get('acodec') == 'copy' else AUDIO_COST
+    else:
+        cost = CODEC_COSTS.get(options.get('vcodec'), DEFAULT_VIDEO_COST)
+    return min(cost, cpu_budget)
+
+def target_file_type(format: str) -> str:
+    """Returns 'audio' for audio target formats (including extraction from video), otherwise 'video'."""
+    return 'audio' if format in AUDIO_TARGET_FORMATS else 'video'
+
+def collect_media_files(source: str, extensions: set) -> list:
+    """Finds media files in a directory (recursively) or matching a glob pattern."""
+    source_path = Path(source).expanduser()
+    if source_path.is_dir():
+        candidates = source_path.glob('**/*')
+    else:
+        candidates = (Path(match) for match in glob.glob(str(source_path), recursive=True))
+    return sorted(
+        (f for f in candidates if f.is_file() and f.suffix.lower() in extensions),
+        key=lambda x: x.name.lower()
+    )
+
+def plan_batch_outputs(files: list, output_dir: Path, format: str) -> list:
+    """Pairs each input with an output path in output_dir, keeping names unique within the batch."""
+    used_names = set()
+    plan = []
+    for file_path in files:
+        stem = utils.sanitize_filename(file_path.stem)
+        name = f"{stem}.{format}"
+        counter = 1
+        while name.lower() in used_names:
+            name = f"{stem}_{counter}.{format}"
+            counter += 1
+        used_names.add(name.lower())
+        plan.append((file_path, output_dir / name))
+    return plan
+
+def _run_conversion_job(job: dict) -> dict:
+    """Runs one batch conversion and records the outcome."""
+    start = time.perf_counter()
+    ok = convert_media(job['input'], job['output'], job['format'], job['file_type'],
+                       threads=job['threads'], verbose=False, plan=job['plan'], profile=job['profile'])
+    job.update(ok=ok, seconds=time.perf_counter() - start,
+               bytes=job['output'].stat().st_size if ok and job['output'].exists() else 0)
+    return job
+
+def run_batch_conversion(plan: list, format: str, file_type: str, cpu_budget: float = None,
+                         overwrite: bool = False, profile: str = None) -> list:
+    """Converts (input, output) pairs concurrently while keeping the summed job cost within cpu_budget.
+
+    The most expensive jobs start first, and cheaper ones (such as stream
+    copies) fill the remaining budget. Video encoders are limited to as many
+    threads as their cost, so parallel jobs do not oversubscribe the cores.
+    Returns one result dict per pair, in input order.
+    """
+    cpu_budget = cpu_budget or CONVERT_CPU_BUDGET
+
+    results = []
+    pending = []
+    # Probe all inputs in parallel before planning the jobs one by one
+    probe_cache.prefetch(input_path for input_path, output_path in plan
+                         if overwrite or not output_path.exists())
+    for index, (input_path, output_path) in enumerate(plan):
+        job = {'index': index, 'input': input_path, 'output': output_path, 'format': format,
+               'file_type': file_type, 'profile': profile, 'plan': None, 'cost': 0.0, 'threads': None,
+               'ok': False, 'skipped': False, 'seconds': 0.0, 'bytes': 0}
+        if output_path.exists() and not overwrite:
+            job['skipped'] = True
+        else:
+            # Price each job by what it will really do (remux vs encode)
+            job['plan'] = plan_conversion(input_path, format, file_type, profile=profile)
+            job['cost'] = conversion_cost(format, file_type, cpu_budget, job['plan'])
+            if file_type == 'video' and job['cost'] >= 1:
+                job['threads'] = max(1, round(job['cost']))
+            pending.append(job)
+        results.append(job)
+    pending.sort(key=lambda job: job['cost'], reverse=True)
+
+    running = {}
+    used = 0.0
+    total = len(pending)
+    started = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(total, int(cpu_budget / CODEC_COSTS['copy'])))) as executor:
+        while pending or running:
+            # Start every waiting job that fits in the remaining budget (at least one job always runs)
+            for job in list(pending):
+                if running and used + job['cost'] > cpu_budget:
+                    continue
+                pending.remove(job)
+                used += job['cost']
+                started += 1
+                path = job['plan']['path'] if job['plan'] else 'unprobed'
+                print(f"▶️  [{started}/{total}] {job['input'].name} → {job['output'].name} ({path})")
+                running[executor.submit(_run_conversion_job, job)] = job
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                used -= job['cost']
+                future.result()
+                status = "✅" if job['ok'] else "❌"
+                print(f"{status} {job['input'].name} ({job['seconds']:.1f}s)")
+
+    return results
+
+def print_conversion_summary(results: list, wall_time: float):
+    """Prints a table of per-file outcomes followed by totals."""
+    print("\n--- Batch Conversion Summary ---")
+    for i, result in enumerate(results):
+        status = "SKIPPED" if result['skipped'] else ("OK" if result['ok'] else "FAILED")
+        size = result['bytes'] / (1024 * 1024)
+        print(f"{i + 1:>3}  {status:<7}  {size:>8.1f} MB  {result['seconds']:>7.1f}s  "
+              f"{result['input'].name} → {result['output'].name}")
+
+    succeeded = sum(1 for result in results if result['ok'])
+    skipped = sum(1 for result in results if result['skipped'])
+    print(f"\n✅ Converted: {succeeded}")
+    print(f"⏭️  Skipped:   {skipped} (output already exists)")
+    print(f"❌ Failed:    {len(results) - succeeded - skipped}")
+    print(f"⏱️  Wall time: {wall_time:.1f}s")
+
+def run_batch_conversion_cli(source: str, format: str, output_dir: Path, cpu_budget: float = None,
+                             overwrite: bool = False, profile: str = None) -> bool:
+    """Converts every matching file in source (a folder or glob) to format. Returns True if none failed."""
+    file_type = target_file_type(format)
+    # Audio targets also accept video inputs (audio extraction)
+    extensions = AUDIO_EXTENSIONS | VIDEO_EXTENSIONS if file_type == 'audio' else VIDEO_EXTENSIONS
+    files = collect_media_files(source, extensions)
+    if not files:
+        print(f"❌ No media files found for: {source}")
+        return False
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    plan = plan_batch_outputs(files, output_dir, format)
+    cpu_budget = cpu_budget or CONVERT_CPU_BUDGET
+    cost = conversion_cost(format, file_type, cpu_budget)
+    print(f"📋 Batch conversion: {len(plan)} file(s) to {format.upper()}, "
+          f"CPU budget {cpu_budget:g}, cost {cost:g} per job, {profile or DEFAULT_PROFILE} profile")
+    start = time.perf_counter()
+    results = run_batch_conversion(plan, format, file_type, cpu_budget, overwrite, profile)
+    print_conversion_summary(results, time.perf_counter() - start)
+    return all(result['ok'] or result['skipped'] for result in results)
+
+def select_batch_source(file_type: str):
+    """Lets the user pick a dated download/convert folder or enter a glob pattern."""
+    folders = sorted(
+        [d for base in (utils.DOWNLOAD_DIR_BASE, utils.CONVERT_DIR_BASE) if base.exists()
+         for d in base.iterdir() if d.is_dir()],
+        key=lambda d: (d.name, d.parent.name), reverse=True
+    )
+    print(f"\n--- Select {file_type.title()} Files to Convert ---")
+    for i, folder in enumerate(folders):
+        print(f"{i + 1}: {folder.parent.name}/{folder.name}")
+    print(f"{len(folders) + 1}: Enter a folder or glob pattern (e.g. ~/Videos/**/*.mkv)")
+
+    try:
+        choice = int(input("> Select an option: ")) - 1
+    except ValueError:
+        print("❌ Invalid input. Please enter a number.")
+        return None
+    if 0 <= choice < len(folders):
+        return str(folders[choice])
+    if choice == len(folders):
+        return input("> Folder or glob pattern: ").strip() or None
+    print("❌ Invalid selection.")
+    return None
+
+def run_batch_conversion_menu():
+    """Menu flow for converting many files at once."""
+    file_type = select_file_type()
+    source = select_batch_source(file_type)
+    if not source:
+        input("Press Enter to return to the main menu.")
+        return
+
+    files = collect_media_files(source, AUDIO_EXTENSIONS if file_type == 'audio' else VIDEO_EXTENSIONS)
+    if not files:
+        print(f"\n❌ No {file_type} files found in: {source}")
+        input("Press Enter to return to the main menu.")
+        return
+    print(f"\n📂 Found {len(files)} {file_type} file(s)")
+
+    target_format, output_type = select_target_format(file_type, None)
+    profile = select_encoding_profile()
+    _, daily_convert_path = utils.get_daily_paths()
+    daily_convert_path.mkdir(parents=True, exist_ok=True)
+    plan = plan_batch_outputs(files, daily_convert_path, target_format)
+
+    existing = sum(1 for _, output_path in plan if output_path.exists())
+    overwrite = False
+    if existing:
+        answer = input(f"\n⚠️  {existing} output file(s) already exist. Overwrite them? (y/N): ").lower().strip()
+        overwrite = answer in ['y', 'yes']
+
+    cost = conversion_cost(target_format, output_type)
+    print(f"\n🚀 Converting {len(plan)} file(s) to {target_format.upper()} "
+          f"(CPU budget {CONVERT_CPU_BUDGET}, cost {cost:g} per job, {profile} profile)")
+    start = time.perf_counter()
+    results = run_batch_conversion(plan, target_format, output_type, overwrite=overwrite, profile=profile)
+    print_conversion_summary(results, time.perf_counter() - start)
+    print(f"📂 Converted files are in: {daily_convert_path}")
+
+    input("\nPress Enter to return to the main menu.")
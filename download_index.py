@@ -0,0 +1,146 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from pytube import extract
+import utils
+
+# Query parameters that never change the media a URL points to
+TRACKING_PARAMS = {'fbclid', 'gclid', 'si', 'feature', 'ref', 'ref_src'}
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_db_lock = threading.Lock()
+
+def normalize_url(url: str) -> str:
+    """Normalizes a source URL so equivalent links map to the same index entry."""
+    url = url.strip()
+
+    # All YouTube URL variants of one video share a key
+    if 'youtube.com' in url or 'youtu.be' in url:
+        try:
+            return f"youtube:{extract.video_id(url)}"
+        except Exception:
+            pass
+
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if parts.port and not (parts.scheme == 'http' and parts.port == 80) and not (parts.scheme == 'https' and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    )
+    return urlunsplit((parts.scheme.lower(), host, parts.path or '/', urlencode(query), ''))
+
+@contextmanager
+def _open_index():
+    """Opens the index database (creating the schema on first use), commits and closes it."""
+    connection = sqlite3.connect(utils.get_cache_dir('index') / 'downloads.sqlite3', timeout=30)
+    try:
+        with _db_lock, connection:
+            _create_schema(connection)
+            yield connection
+    finally:
+        connection.close()
+
+def _create_schema(connection: sqlite3.Connection):
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS downloads ("
+        " url TEXT PRIMARY KEY,"
+        " path TEXT NOT NULL,"
+        " size INTEGER NOT NULL,"
+        " mtime REAL NOT NULL,"
+        " sha256 TEXT NOT NULL,"
+        " created REAL NOT NULL)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS downloads_sha256 ON downloads (sha256)")
+
+def file_sha256(path: Path) -> str:
+    """Returns the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _is_unchanged(path: Path, size: int, mtime: float) -> bool:
+    """Checks that an indexed file still exists with the recorded size and mtime."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return False
+    return stat.st_size == size and abs(stat.st_mtime - mtime) < 1
+
+def lookup_url(url: str):
+    """Returns the stored file for a source URL, or None if it was never downloaded or has changed."""
+    key = normalize_url(url)
+    with _open_index() as connection:
+        row = connection.execute("SELECT path, size, mtime FROM downloads WHERE url = ?", (key,)).fetchone()
+        if not row:
+            return None
+        path = Path(row[0])
+        if _is_unchanged(path, row[1], row[2]):
+            return path
+        # The file was moved, deleted or edited since it was indexed
+        connection.execute("DELETE FROM downloads WHERE url = ?", (key,))
+    return None
+
+def lookup_hash(sha256: str, exclude: Path = None):
+    """Returns an existing stored file with the given content hash, or None."""
+    with _open_index() as connection:
+        rows = connection.execute("SELECT path, size, mtime FROM downloads WHERE sha256 = ?", (sha256,)).fetchall()
+    for path, size, mtime in rows:
+        path = Path(path)
+        if path != exclude and _is_unchanged(path, size, mtime):
+            return path
+    return None
+
+def link_into(existing: Path, target_dir: Path) -> Path:
+    """Makes an indexed file available in target_dir via a hardlink.
+
+    Returns the linked path, or the existing path itself when it already lives
+    there or the filesystem cannot hardlink it.
+    """
+    target = target_dir / existing.name
+    if target.exists():
+        # Either the same file already or an unrelated file with that name
+        return target if os.path.samefile(target, existing) else existing
+    try:
+        os.link(existing, target)
+        return target
+    except OSError:
+        return existing
+
+def record_download(url: str, path: Path) -> Path:
+    """Indexes a finished download by URL and content hash.
+
+    If the same bytes are already stored elsewhere, the new file is replaced
+    by a hardlink to the existing one so the content is kept only once on disk.
+    Returns the path of the recorded file.
+    """
+    path = Path(path).resolve()
+    if not path.is_file():
+        return path
+
+    sha256 = file_sha256(path)
+    duplicate = lookup_hash(sha256, exclude=path)
+    if duplicate and not os.path.samefile(duplicate, path):
+        try:
+            tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.link")
+            os.link(duplicate, tmp_path)
+            os.replace(tmp_path, path)
+            print(f"♻️  Same content already stored at {duplicate}, hardlinked instead of keeping a copy")
+        except OSError:
+            pass
+
+    stat = path.stat()
+    with _open_index() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO downloads (url, path, size, mtime, sha256, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (normalize_url(url), str(path), stat.st_size, stat.st_mtime, sha256, time.time())
+        )
+    return path
@@ -1,68 +1,583 @@
 import requests
-from pytube import YouTube
+import pytube.request
+from pytube import YouTube, extract
 from tqdm import tqdm
 from pathlib import Path
 from bs4 import BeautifulSoup
 import utils
+import download_index
+import ratelimit
 import subprocess
 import re
+import json
+import random
+import hashlib
+import importlib.util
+from urllib.parse import urljoin, urlparse
 import tempfile
 import os
 import shutil
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
 
-def download_direct_url(url: str, output_path: Path, headers=None):
-    """Downloads a file from a direct URL with a progress bar."""
+# Faster HTML parser backend when available
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.webm', '.avi', '.m4v', '.flv', '.wmv')
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac', '.wma')
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Shared HTTP session settings
+HTTP_POOL_SIZE = 32
+HTTP_TIMEOUT = (10, 30)  # (connect, read) seconds
+HTTP_RETRIES = 5
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_BACKOFF_JITTER = 0.5
+
+# Number of HLS segments fetched in parallel by download_hls_alternative
+HLS_SEGMENT_WORKERS = 8
+# Chunk size used when streaming HLS segment bodies
+HLS_CHUNK_SIZE = 64 * 1024
+# Memory cap for segments that arrive ahead of the next one to be written
+HLS_REORDER_BUFFER_BYTES = 64 * 1024 * 1024
+# Extra attempts for a failed HLS segment, with exponential backoff starting at HLS_RETRY_BACKOFF seconds
+HLS_SEGMENT_RETRIES = 4
+HLS_RETRY_BACKOFF = 0.5
+# Minimum seconds between saves of the HLS job manifest
+HLS_MANIFEST_INTERVAL = 1.0
+# Variant selection policy for HLS master playlists (None disables a limit).
+# HLS_REALTIME_FACTOR=0.5 picks the best variant whose first segments download
+# in at most half their playback time.
+HLS_MAX_HEIGHT = None
+HLS_MAX_BANDWIDTH = None
+HLS_REALTIME_FACTOR = None
+# Segments downloaded per variant when measuring throughput
+HLS_PROBE_SEGMENTS = 2
+# Stop live HLS capture after this many seconds (None captures until ENDLIST or Ctrl-C)
+HLS_LIVE_MAX_DURATION = None
+# Stop live HLS capture when no new segment has appeared for this many target durations
+HLS_LIVE_STALL_TARGETS = 3
+# Limits for crawling a page and its iframes for media sources
+CRAWL_MAX_DEPTH = 3
+CRAWL_MAX_PAGES = 30
+CRAWL_WORKERS = 8
+# How YouTube adaptive streams are merged: 'files' or 'pipe' (see download_youtube_adaptive)
+ADAPTIVE_MERGE_MODE = 'files'
+# Smallest pytube range request while a bandwidth limit is set (see _pytube_ranges_for_limit)
+PYTUBE_LIMITED_MIN_RANGE = 64 * 1024
+# YouTube metadata cache: entry lifetime in seconds and total size limit
+YOUTUBE_CACHE_TTL = 7 * 24 * 3600
+YOUTUBE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+# Parallel connections for direct downloads (1 keeps the single-stream path)
+DIRECT_DOWNLOAD_CONNECTIONS = 1
+# Files smaller than this are always fetched over a single connection
+SEGMENTED_MIN_SIZE = 16 * 1024 * 1024
+# Smallest byte range handed to one connection in segmented mode
+SEGMENTED_MIN_PIECE = 4 * 1024 * 1024
+# Read size bounds for direct downloads; reads grow or shrink to take about DIRECT_READ_TARGET seconds
+DIRECT_READ_MIN = 64 * 1024
+DIRECT_READ_MAX = 4 * 1024 * 1024
+DIRECT_READ_TARGET = 0.1
+# Minimum seconds between progress bar refreshes for direct downloads
+DIRECT_PROGRESS_INTERVAL = 0.2
+
+_claims_lock = threading.Lock()
+_claimed_paths = {}  # output path -> token of the job writing it
+_held_claims = 0  # open hold_output_claims() blocks
+_current_job = threading.local()
+
+def _job_token():
+    """Identifies the download job running on this thread (the thread itself outside handle_download)."""
+    return getattr(_current_job, 'token', None) or threading.get_ident()
+
+def claim_output_path(file_path: Path) -> Path:
+    """Reserves an output path for the calling job.
+
+    While another job holds the same path, a numbered suffix is added
+    (video.mp4, video_1.mp4, ...), so jobs never share a file or its
+    .part/.json sidecars. Claiming a path the same job already holds returns
+    it unchanged.
+    """
+    owner = _job_token()
+    with _claims_lock:
+        candidate = file_path
+        counter = 1
+        while _claimed_paths.get(candidate, owner) != owner:
+            candidate = file_path.with_name(f"{file_path.stem}_{counter}{file_path.suffix}")
+            counter += 1
+        _claimed_paths[candidate] = owner
+    return candidate
+
+def _release_output_paths(owner):
+    with _claims_lock:
+        if _held_claims:
+            # Kept until the surrounding batch ends, so later jobs pick other names
+            return
+        for path in [path for path, holder in _claimed_paths.items() if holder == owner]:
+            del _claimed_paths[path]
+
+@contextmanager
+def hold_output_claims():
+    """Keeps the paths of finished jobs reserved until the block ends.
+
+    Used by batch runs so every job of a batch writes its own file, even
+    when it starts after an earlier job with the same filename finished.
+    """
+    global _held_claims
+    with _claims_lock:
+        _held_claims += 1
     try:
-        if headers is None:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        yield
+    finally:
+        with _claims_lock:
+            _held_claims -= 1
+            if not _held_claims:
+                _claimed_paths.clear()
+
+def temp_output_path(file_path: Path) -> Path:
+    """Returns a sibling path with the same extension to write a file before moving it into place.
+
+    Writing to the final name would truncate that file in place, which also
+    destroys every other name the download index hardlinked to it; os.replace
+    from this path swaps only the directory entry.
+    """
+    return file_path.with_name(f"{file_path.stem}.tmp{file_path.suffix}")
+
+def direct_output_filename(url: str) -> str:
+    """Builds a safe local filename from the last path component of a URL."""
+    filename = url.split('/')[-1]
+    
+    # Sanitize filename
+    safe_filename = utils.sanitize_filename(filename)
+    if not safe_filename: # Handle cases where URL ends with /
+        safe_filename = "downloaded_file"
+    return safe_filename
+
+def hls_output_filename(title: str = None) -> str:
+    """Builds a safe .mp4 filename for an HLS download from its title."""
+    if title:
+        safe_filename = utils.sanitize_filename(title)
+        if not safe_filename.endswith('.mp4'):
+            safe_filename += '.mp4'
+    else:
+        safe_filename = "video_stream.mp4"
+    return safe_filename
+
+def _load_json(meta_path: Path):
+    """Reads a JSON sidecar or cache file, or None if it is missing or invalid."""
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_part_metadata(meta_path: Path, url: str, response, total_size: int, preallocated: bool = False,
+                        segments: dict = None):
+    """Stores the validators needed to safely resume a .part file later.
+
+    preallocated marks a .part file whose size does not yet reflect the bytes
+    written, so it must not be resumed if the process dies before it is trimmed.
+    segments records the piece size and finished pieces of a multi-connection
+    download, which is resumed piece by piece instead.
+    """
+    metadata = {
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'length': total_size,
+        'preallocated': preallocated,
+    }
+    if segments is not None:
+        metadata['segments'] = segments
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+
+def _resume_matches(metadata: dict, response) -> bool:
+    """Checks that a 206 response belongs to the same file version as the .part file."""
+    if response.status_code != 206:
+        return False
+    for key, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified')):
+        if metadata.get(key) and response.headers.get(header) not in (None, metadata[key]):
+            return False
+    # Content-Range: bytes <start>-<end>/<total>
+    content_range = response.headers.get('Content-Range', '')
+    total_match = re.search(r'/(\d+)$', content_range)
+    if metadata.get('length') and total_match:
+        return int(total_match.group(1)) == metadata['length']
+    return bool(total_match)
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies HTTP_TIMEOUT to requests that do not set their own."""
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = HTTP_TIMEOUT
+        return super().send(request, **kwargs)
+
+_session = None
+_session_lock = threading.Lock()
+
+def _build_retry() -> Retry:
+    """Retry policy with exponential backoff and jitter for transient failures."""
+    retry_options = dict(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    try:
+        return Retry(backoff_jitter=HTTP_BACKOFF_JITTER, **retry_options)
+    except TypeError:
+        # urllib3 < 2.0 has no jitter support
+        return Retry(**retry_options)
+
+def get_session() -> requests.Session:
+    """Returns the shared pooled HTTP session used by every download path."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers['User-Agent'] = USER_AGENT
+            adapter = _TimeoutHTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=_build_retry(),
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+def _read_chunks(response, min_size: int = None, max_size: int = None):
+    """Yields the response body in chunks sized to the connection speed.
+
+    Reads start at min_size and double while the socket fills them quickly,
+    up to max_size, so fast links need few Python iterations while slow links
+    still report progress regularly. A configured rate limit caps the read size
+    so throttling stays smooth.
+    """
+    min_size = min_size or DIRECT_READ_MIN
+    max_size = max_size or DIRECT_READ_MAX
+    rate = ratelimit.effective_rate()
+    if rate:
+        max_size = max(min_size, min(max_size, int(rate * DIRECT_READ_TARGET)))
+    
+    read_size = min_size
+    while True:
+        start = time.monotonic()
+        try:
+            chunk = response.raw.read(read_size, decode_content=True)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+        if not chunk:
+            return
+        yield chunk
+        
+        elapsed = time.monotonic() - start
+        if elapsed < DIRECT_READ_TARGET / 2 and len(chunk) == read_size:
+            read_size = min(read_size * 2, max_size)
+        elif elapsed > DIRECT_READ_TARGET:
+            read_size = max(read_size // 2, min_size)
+
+def _update_progress(pbar, amount: int, pbar_lock=None):
+    """Advances a progress bar that may be shared between threads."""
+    if not amount:
+        return
+    if pbar_lock is None:
+        pbar.update(amount)
+    else:
+        with pbar_lock:
+            pbar.update(amount)
+
+class _RangeAborted(Exception):
+    """Raised in byte-range fetches once another range of the same download has failed."""
+
+def _write_response(response, f, pbar, job_limiter=None, pbar_lock=None, stop_event=None) -> int:
+    """Streams a response body into an open file, refreshing the progress bar at a bounded rate.
+
+    Setting stop_event makes it raise _RangeAborted at the next chunk.
+    Returns the number of bytes written.
+    """
+    written = pending = 0
+    last_refresh = time.monotonic()
+    for chunk in _read_chunks(response):
+        if stop_event is not None and stop_event.is_set():
+            _update_progress(pbar, pending, pbar_lock)
+            raise _RangeAborted("Stopped after another range failed")
+        ratelimit.throttle(len(chunk), job_limiter)
+        f.write(chunk)
+        written += len(chunk)
+        pending += len(chunk)
+        now = time.monotonic()
+        if now - last_refresh >= DIRECT_PROGRESS_INTERVAL:
+            _update_progress(pbar, pending, pbar_lock)
+            pending = 0
+            last_refresh = now
+    _update_progress(pbar, pending, pbar_lock)
+    return written
+
+def _preallocate(f, size: int) -> bool:
+    """Reserves size bytes on disk for f where the platform supports it. Returns True on success."""
+    if not hasattr(os, 'posix_fallocate'):
+        return False
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+        return True
+    except OSError:
+        return False
+
+def _probe_range_support(url: str, headers: dict):
+    """Returns the HEAD response if the server supports byte ranges for a file of known size, otherwise None."""
+    try:
+        response = get_session().head(url, headers=headers, allow_redirects=True)
+        response.raise_for_status()
+    except requests.exceptions.RequestException:
+        return None
+    if response.headers.get('Accept-Ranges', '').lower() != 'bytes':
+        return None
+    if not int(response.headers.get('content-length', 0)):
+        return None
+    return response
+
+def _segments_match(metadata: dict, response, total_size: int) -> bool:
+    """Checks that a HEAD response describes the same file version as a multi-connection .part file."""
+    if not metadata.get('segments') or metadata.get('length') != total_size:
+        return False
+    for key, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified')):
+        if metadata.get(key) != response.headers.get(header):
+            return False
+    return True
+
+def _fetch_byte_range(url: str, headers: dict, part_path: Path, start: int, end: int, pbar, pbar_lock,
+                     job_limiter=None, stop_event=None):
+    """Downloads bytes start..end (inclusive) and writes them at their offset in part_path."""
+    if stop_event is not None and stop_event.is_set():
+        raise _RangeAborted("Stopped after another range failed")
+    range_headers = dict(headers)
+    range_headers['Range'] = f'bytes={start}-{end}'
+    with get_session().get(url, stream=True, headers=range_headers) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise requests.exceptions.RequestException(f"Server ignored range request for bytes {start}-{end}")
+        
+        with open(part_path, 'r+b') as f:
+            f.seek(start)
+            written = _write_response(response, f, pbar, job_limiter, pbar_lock, stop_event)
+    
+    if written != end - start + 1:
+        raise requests.exceptions.RequestException(
+            f"Incomplete range {start}-{end}: got {written} of {end - start + 1} bytes"
+        )
+
+def _download_segmented(url: str, headers: dict, part_path: Path, meta_path: Path, head_response, total_size: int,
+                        connections: int, desc: str, job_limiter=None, metadata: dict = None):
+    """Fetches a file as byte ranges over several connections into a preallocated file.
+
+    Finished pieces are recorded in the .part.json sidecar, and metadata from
+    an earlier attempt at the same file version skips the pieces it already
+    holds. The first failing range stops the others; the .part file and
+    sidecar are kept so the next run resumes.
+    """
+    segments = metadata.get('segments') if metadata else None
+    if segments and part_path.exists() and part_path.stat().st_size == total_size:
+        piece_size = segments['piece_size']
+        done = set(segments['done'])
+    else:
+        piece_size = max(SEGMENTED_MIN_PIECE, -(-total_size // (connections * 4)))
+        done = set()
+        # Preallocate the file so every range can be written at its offset
+        with open(part_path, 'wb') as f:
+            f.truncate(total_size)
+    ranges = [(start, min(start + piece_size, total_size) - 1) for start in range(0, total_size, piece_size)]
+    
+    def save_progress():
+        _save_part_metadata(meta_path, url, head_response, total_size, preallocated=True,
+                            segments={'piece_size': piece_size, 'done': sorted(done)})
+    save_progress()
+    
+    initial = sum(end - start + 1 for index, (start, end) in enumerate(ranges) if index in done)
+    if initial:
+        print(f"Resuming: {len(done)} of {len(ranges)} pieces already downloaded")
+    stop_event = threading.Event()
+    failure = None
+    pbar_lock = threading.Lock()
+    with tqdm(total=total_size, initial=initial, unit='B', unit_scale=True, unit_divisor=1024, desc=desc) as pbar:
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            futures = {
+                executor.submit(_fetch_byte_range, url, headers, part_path, start, end, pbar, pbar_lock,
+                                job_limiter, stop_event): index
+                for index, (start, end) in enumerate(ranges) if index not in done
             }
-            
-        response = requests.get(url, stream=True, headers=headers)
-        response.raise_for_status()  # Raise an exception for bad status codes
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except _RangeAborted:
+                    continue
+                except Exception as e:
+                    if failure is None:
+                        # Stop the other connections: queued ranges are dropped, running ones end at their next chunk
+                        failure = e
+                        stop_event.set()
+                        for pending in futures:
+                            pending.cancel()
+                    continue
+                done.add(futures[future])
+                save_progress()
+    if failure is not None:
+        raise failure
+
+def download_direct_url(url: str, output_path: Path, headers=None, connections: int = None):
+    """Downloads a file from a direct URL with a progress bar.
 
-        total_size = int(response.headers.get('content-length', 0))
-        filename = url.split('/')[-1]
+    Data is written to a .part file with a small .part.json sidecar holding the
+    ETag, Last-Modified and length, so an interrupted download resumes with a
+    Range request instead of starting over. With connections > 1, large files
+    on servers that accept byte ranges are fetched over several connections.
+    """
+    part_path = None
+    try:
+        if headers is None:
+            headers = {}
+            
+        file_path = claim_output_path(output_path / direct_output_filename(url))
+        safe_filename = file_path.name
+        part_path = file_path.with_name(file_path.name + '.part')
+        meta_path = file_path.with_name(file_path.name + '.part.json')
         
-        # Sanitize filename
-        safe_filename = utils.sanitize_filename(filename)
-        if not safe_filename: # Handle cases where URL ends with /
-            safe_filename = "downloaded_file"
+        # Try to resume a previous partial download of the same URL. A file that
+        # is still marked preallocated was never trimmed, so its size is meaningless
+        # (multi-connection downloads are resumed from their list of finished pieces).
+        metadata = _load_json(meta_path) if part_path.exists() else None
+        if metadata and metadata.get('url') != url:
+            metadata = None
+        resumable = metadata and not metadata.get('preallocated')
+        resume_from = part_path.stat().st_size if resumable else 0
+        
+        if connections is None:
+            connections = DIRECT_DOWNLOAD_CONNECTIONS
+        job_limiter = ratelimit.new_job_limiter()
+        
+        if connections > 1 and not resume_from:
+            head_response = _probe_range_support(url, headers)
+            total_size = int(head_response.headers['content-length']) if head_response is not None else None
+            if total_size and total_size >= SEGMENTED_MIN_SIZE:
+                print(f"Downloading: {safe_filename} ({connections} connections)")
+                if metadata and not _segments_match(metadata, head_response, total_size):
+                    if metadata.get('segments'):
+                        print("Remote file changed since the partial download, restarting from the beginning")
+                    metadata = None
+                _download_segmented(url, headers, part_path, meta_path, head_response, total_size,
+                                    connections, safe_filename, job_limiter, metadata)
+                part_path.replace(file_path)
+                meta_path.unlink(missing_ok=True)
+                print(f"✅ Download complete: {file_path}")
+                return file_path
+            if not total_size:
+                print("Server does not support byte ranges for this file, using a single connection")
+        
+        response = None
+        if resume_from:
+            resume_headers = dict(headers)
+            resume_headers['Range'] = f'bytes={resume_from}-'
+            validator = metadata.get('etag') or metadata.get('last_modified')
+            if validator:
+                resume_headers['If-Range'] = validator
+            response = get_session().get(url, stream=True, headers=resume_headers)
+            
+            if response.status_code == 416 and resume_from == metadata.get('length'):
+                # The .part file already holds the complete download
+                response.close()
+                part_path.replace(file_path)
+                meta_path.unlink(missing_ok=True)
+                print(f"✅ Download complete: {file_path}")
+                return file_path
+            
+            if response.status_code == 200:
+                # Server ignored the range or the file changed; take the full body
+                print("Server did not accept resume, restarting download from the beginning")
+                resume_from = 0
+            elif not _resume_matches(metadata, response):
+                print("Remote file changed since the partial download, restarting from the beginning")
+                response.close()
+                response = None
+                resume_from = 0
+        
+        if response is None:
+            response = get_session().get(url, stream=True, headers=headers)
+        response.raise_for_status()  # Raise an exception for bad status codes
 
-        file_path = output_path / safe_filename
+        total_size = resume_from + int(response.headers.get('content-length', 0))
+        # Reserve the whole file up front for plain bodies of known size
+        preallocate = (not resume_from and total_size > 0
+                       and response.headers.get('Content-Encoding', 'identity') == 'identity')
+        if resume_from:
+            print(f"Resuming: {safe_filename} from {resume_from / (1024*1024):.1f} MB")
+        else:
+            _save_part_metadata(meta_path, url, response, total_size, preallocated=preallocate)
+            print(f"Downloading: {safe_filename}")
         
-        print(f"Downloading: {safe_filename}")
         with tqdm(
             total=total_size, 
+            initial=resume_from,
             unit='B', 
             unit_scale=True, 
             unit_divisor=1024,
             desc=safe_filename
         ) as pbar:
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        pbar.update(len(chunk))
+            with open(part_path, 'ab' if resume_from else 'wb') as f:
+                if preallocate and not _preallocate(f, total_size):
+                    preallocate = False
+                    _save_part_metadata(meta_path, url, response, total_size)
+                try:
+                    _write_response(response, f, pbar, job_limiter)
+                finally:
+                    if preallocate:
+                        # Trim to the bytes actually received so the .part file can be resumed
+                        f.truncate(f.tell())
+                        _save_part_metadata(meta_path, url, response, total_size)
+        
+        downloaded_size = part_path.stat().st_size
+        if total_size > resume_from and downloaded_size < total_size:
+            print(f"❌ Download incomplete ({downloaded_size} of {total_size} bytes). Run it again to resume.")
+            return
+        
+        part_path.replace(file_path)
+        meta_path.unlink(missing_ok=True)
         print(f"✅ Download complete: {file_path}")
+        return file_path
 
     except requests.exceptions.RequestException as e:
         print(f"❌ Error downloading direct URL: {e}")
+        if part_path and part_path.exists():
+            print("Partial data was kept; downloading the same URL again will resume it.")
+    except OSError as e:
+        print(f"❌ Error writing download: {e}")
 
 
 ### HLS Stream Downloading
 def download_hls_stream(m3u8_url: str, output_path: Path, title: str = None, referer: str = None):
     """Downloads HLS stream using ffmpeg with proper headers."""
+    if ratelimit.is_limited():
+        # ffmpeg cannot be throttled, so fetch the segments ourselves
+        return download_hls_alternative(m3u8_url, output_path, title, referer)
+
     try:
         # Create a safe filename
-        if title:
-            safe_filename = utils.sanitize_filename(title)
-            if not safe_filename.endswith('.mp4'):
-                safe_filename += '.mp4'
-        else:
-            safe_filename = "video_stream.mp4"
-        
-        file_path = output_path / safe_filename
+        file_path = claim_output_path(output_path / hls_output_filename(title))
+        safe_filename = file_path.name
         
         print(f"Downloading HLS stream: {safe_filename}")
         print("This may take a while depending on the video length...")
@@ -74,30 +589,34 @@ def download_hls_stream(m3u8_url: str, output_path: Path, title: str = None, ref
         if referer:
             ffmpeg_cmd.extend([
                 '-headers', f'Referer: {referer}',
-                '-headers', 'User-Agent: Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                '-headers', f'User-Agent: {USER_AGENT}'
             ])
         else:
             ffmpeg_cmd.extend([
-                '-user_agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                '-user_agent', USER_AGENT
             ])
         
+        tmp_path = temp_output_path(file_path)
         ffmpeg_cmd.extend([
             '-i', m3u8_url,
             '-c', 'copy',  # Copy streams without re-encoding for speed
             '-y',  # Overwrite output file without asking
-            str(file_path)
+            str(tmp_path)
         ])
         
         print(f"Running ffmpeg command...")
         result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
         
         if result.returncode == 0:
+            os.replace(tmp_path, file_path)
             print(f"✅ HLS download complete: {file_path}")
+            return file_path
         else:
+            tmp_path.unlink(missing_ok=True)
             print(f"❌ FFmpeg error: {result.stderr}")
             # Try alternative method
             print("Trying alternative download method...")
-            download_hls_alternative(m3u8_url, output_path, title, referer)
+            return download_hls_alternative(m3u8_url, output_path, title, referer)
             
     except FileNotFoundError:
         print("❌ FFmpeg not found. Please install FFmpeg to download HLS streams.")
@@ -105,19 +624,480 @@ def download_hls_stream(m3u8_url: str, output_path: Path, title: str = None, ref
     except Exception as e:
         print(f"❌ Error downloading HLS stream: {e}")
 
-def download_hls_alternative(m3u8_url: str, output_path: Path, title: str = None, referer: str = None):
-    """Alternative method to download HLS stream by downloading segments manually."""
+class _SegmentAborted(Exception):
+    """Raised in segment fetches once the assembler has been aborted."""
+
+class _SegmentAssembler:
+    """Appends HLS segments to the output file in playlist order as they arrive.
+
+    The segment at the next expected index streams straight into the file.
+    Segments that finish early are held in memory until their turn, and their
+    fetches pause once the reorder buffer reaches max_buffer_bytes.
+
+    on_segment(index, size) is called, in order, as each segment lands in the
+    file (size is None for a skipped segment). A segment that fails for good is
+    skipped when skip_failed is set; otherwise the assembler stops at it so the
+    file never contains a gap.
+    """
+
+    def __init__(self, output_file, max_buffer_bytes: int, next_index: int = 0, bytes_written: int = 0,
+                 on_segment=None, skip_failed: bool = True):
+        self.output_file = output_file
+        self.max_buffer_bytes = max_buffer_bytes
+        self.next_index = next_index
+        self.buffered_bytes = 0
+        self.bytes_written = bytes_written
+        self.pending = {}  # index -> (list of chunks, size) for completed out-of-order segments
+        self.on_segment = on_segment
+        self.skip_failed = skip_failed
+        self.aborted = False
+        self.condition = threading.Condition()
+
+    def _write(self, chunk: bytes):
+        self.output_file.write(chunk)
+        self.bytes_written += len(chunk)
+
+    def write_segment(self, index: int, chunks) -> int:
+        """Consumes the chunks of one segment and returns its size in bytes."""
+        parts = []
+        direct = False
+        start_offset = None
+        size = 0
+        try:
+            for chunk in chunks:
+                if self.aborted:
+                    raise _SegmentAborted(f"Segment {index} cancelled")
+                if not chunk:
+                    continue
+                if not direct:
+                    with self.condition:
+                        self.condition.wait_for(
+                            lambda: self.aborted or index == self.next_index
+                            or self.buffered_bytes < self.max_buffer_bytes
+                        )
+                        if self.aborted:
+                            raise _SegmentAborted(f"Segment {index} cancelled")
+                        direct = index == self.next_index
+                        if not direct:
+                            parts.append(chunk)
+                            self.buffered_bytes += len(chunk)
+                            size += len(chunk)
+                            continue
+                        # Our turn: flush what we buffered so far, then write directly
+                        start_offset = (self.output_file.tell(), self.bytes_written)
+                        for part in parts:
+                            self._write(part)
+                            self.buffered_bytes -= len(part)
+                        parts = []
+                        self.condition.notify_all()
+                self._write(chunk)
+                size += len(chunk)
+        except Exception:
+            with self.condition:
+                if direct:
+                    # Drop the partial segment so later segments stay aligned
+                    self.output_file.seek(start_offset[0])
+                    self.output_file.truncate()
+                    self.bytes_written = start_offset[1]
+                self.buffered_bytes -= sum(len(part) for part in parts)
+                self.condition.notify_all()
+            # The segment stays unfinished so it can be retried
+            raise
+
+        self._finish(index, parts, size)
+        return size
+
+    def fail_segment(self, index: int):
+        """Gives up on a segment: skips it, or stops the whole assembly if gaps are not allowed."""
+        if self.skip_failed:
+            self._finish(index, [], None)
+        else:
+            self.abort()
+
+    def abort(self):
+        """Stops assembly; fetches still waiting for their turn raise _SegmentAborted."""
+        with self.condition:
+            self.aborted = True
+            self.condition.notify_all()
+
+    def _finish(self, index: int, parts: list, size):
+        """Marks a segment as complete and flushes any segments now in order."""
+        with self.condition:
+            if self.aborted:
+                return
+            self.pending[index] = (parts, size)
+            while self.next_index in self.pending:
+                parts, size = self.pending.pop(self.next_index)
+                for part in parts:
+                    self._write(part)
+                    self.buffered_bytes -= len(part)
+                if self.on_segment:
+                    self.on_segment(self.next_index, size)
+                self.next_index += 1
+            self.condition.notify_all()
+
+def _iter_hls_segment(segment_url: str, headers: dict, job_limiter=None):
+    """Yields the body of one HLS segment in chunks without loading it into memory."""
+    with get_session().get(segment_url, headers=headers, stream=True) as segment_response:
+        segment_response.raise_for_status()
+        for chunk in segment_response.iter_content(chunk_size=HLS_CHUNK_SIZE):
+            ratelimit.throttle(len(chunk), job_limiter)
+            yield chunk
+
+def _fetch_hls_segment(index: int, segment_url: str, headers: dict, assembler: _SegmentAssembler,
+                       job_limiter=None) -> int:
+    """Streams a single HLS segment into the assembler and returns its size.
+
+    Failed attempts are retried up to HLS_SEGMENT_RETRIES times with jittered
+    exponential backoff before the segment is given up.
+    """
+    for attempt in range(HLS_SEGMENT_RETRIES + 1):
+        try:
+            size = assembler.write_segment(index, _iter_hls_segment(segment_url, headers, job_limiter))
+            break
+        except _SegmentAborted:
+            raise
+        except Exception:
+            if attempt == HLS_SEGMENT_RETRIES or assembler.aborted:
+                assembler.fail_segment(index)
+                raise
+            time.sleep(HLS_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+    
+    # Check if we actually got video data
+    if size < 1000:  # Segments should be much larger
+        print(f"⚠️  Warning: Segment {index} is suspiciously small ({size} bytes)")
+    
+    return size
+
+def _resolve_playlist_url(playlist_url: str, uri: str) -> str:
+    """Makes a playlist entry absolute relative to the playlist it came from."""
+    if uri.startswith('http'):
+        return uri
+    base_url = '/'.join(playlist_url.split('/')[:-1]) + '/'
+    return base_url + uri
+
+def _parse_attribute_list(attributes: str) -> dict:
+    """Parses an HLS attribute list such as BANDWIDTH=1280000,CODECS="avc1,mp4a" into a dict."""
+    return {
+        key: value.strip('"')
+        for key, value in re.findall(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)', attributes)
+    }
+
+def parse_master_playlist(playlist_content: str, playlist_url: str) -> list:
+    """Returns one dict per #EXT-X-STREAM-INF variant with its URL and parsed attributes."""
+    variants = []
+    lines = playlist_content.split('\n')
+    
+    for i, line in enumerate(lines):
+        if not line.startswith('#EXT-X-STREAM-INF:'):
+            continue
+        # Get the next non-comment line which should be the playlist URL
+        variant_url = next(
+            (candidate.strip() for candidate in lines[i + 1:] if candidate.strip() and not candidate.startswith('#')),
+            None
+        )
+        if not variant_url:
+            continue
+        
+        attributes = _parse_attribute_list(line.split(':', 1)[1])
+        resolution = re.match(r'(\d+)x(\d+)', attributes.get('RESOLUTION', ''))
+        variants.append({
+            'url': _resolve_playlist_url(playlist_url, variant_url),
+            'bandwidth': int(attributes.get('BANDWIDTH', 0) or 0),
+            'average_bandwidth': int(attributes.get('AVERAGE-BANDWIDTH', 0) or 0),
+            'width': int(resolution.group(1)) if resolution else None,
+            'height': int(resolution.group(2)) if resolution else None,
+            'codecs': attributes.get('CODECS'),
+            'frame_rate': float(attributes['FRAME-RATE']) if attributes.get('FRAME-RATE') else None,
+        })
+    
+    return variants
+
+def _describe_variant(variant: dict) -> str:
+    """Formats a variant for log output."""
+    details = [f"{variant['bandwidth'] / 1000:.0f} kbps"]
+    if variant['height']:
+        details.append(f"{variant['width']}x{variant['height']}")
+    if variant['codecs']:
+        details.append(variant['codecs'])
+    return ', '.join(details)
+
+def _segment_durations(playlist_content: str) -> list:
+    """Returns the #EXTINF durations of a media playlist in segment order."""
+    return [float(duration) for duration in re.findall(r'^#EXTINF:([\d.]+)', playlist_content, re.MULTILINE)]
+
+def measure_variant_speed(variant: dict, headers: dict = None, probe_segments: int = None):
+    """Downloads the first segments of a variant and returns download time / media duration.
+
+    A value of 0.5 means the variant downloads twice as fast as real time.
+    Returns None if the variant could not be measured.
+    """
+    if probe_segments is None:
+        probe_segments = HLS_PROBE_SEGMENTS
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        playlist_response = get_session().get(variant['url'], headers=headers or {})
+        playlist_response.raise_for_status()
+        playlist_content = playlist_response.text
+        segments = parse_media_playlist(playlist_content, variant['url'])[:probe_segments]
+        media_duration = sum(_segment_durations(playlist_content)[:len(segments)])
+        if not segments or not media_duration:
+            return None
+        
+        def fetch(segment_url):
+            with get_session().get(segment_url, headers=headers or {}, stream=True) as response:
+                response.raise_for_status()
+                for _ in response.iter_content(chunk_size=HLS_CHUNK_SIZE):
+                    pass
+        
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+            list(executor.map(fetch, segments))
+        return (time.monotonic() - start) / media_duration
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️  Could not measure variant {_describe_variant(variant)}: {e}")
+        return None
+
+def select_variant(playlist_content: str, playlist_url: str, headers: dict = None,
+                   max_height: int = None, max_bandwidth: int = None, realtime_factor: float = None):
+    """Picks the best variant of a master playlist that fits the selection policy.
+
+    Variants taller than max_height or above max_bandwidth (bits/s) are skipped.
+    With realtime_factor set, the first segments of each remaining variant are
+    downloaded from the highest bitrate down, and the first one that downloads
+    within realtime_factor x its media duration wins. Policy arguments default
+    to HLS_MAX_HEIGHT, HLS_MAX_BANDWIDTH and HLS_REALTIME_FACTOR. If nothing
+    fits, the lowest-bitrate variant is returned. Returns None for no variants.
+    """
+    max_height = HLS_MAX_HEIGHT if max_height is None else max_height
+    max_bandwidth = HLS_MAX_BANDWIDTH if max_bandwidth is None else max_bandwidth
+    realtime_factor = HLS_REALTIME_FACTOR if realtime_factor is None else realtime_factor
+    
+    variants = parse_master_playlist(playlist_content, playlist_url)
+    if not variants:
+        return None
+    
+    by_bitrate = sorted(variants, key=lambda v: (v['average_bandwidth'] or v['bandwidth'], v['height'] or 0),
+                        reverse=True)
+    for variant in by_bitrate:
+        print(f"  Variant: {_describe_variant(variant)}")
+    
+    candidates = [
+        variant for variant in by_bitrate
+        if (not max_height or not variant['height'] or variant['height'] <= max_height)
+        and (not max_bandwidth or (variant['average_bandwidth'] or variant['bandwidth']) <= max_bandwidth)
+    ]
+    if not candidates:
+        print("⚠️  No variant fits the selection policy, using the lowest bitrate")
+        return by_bitrate[-1]
+    
+    if not realtime_factor:
+        return candidates[0]
+    
+    for variant in candidates:
+        speed = measure_variant_speed(variant, headers)
+        if speed is None:
+            continue
+        print(f"  Measured {_describe_variant(variant)}: {speed:.2f}x real time")
+        if speed <= realtime_factor:
+            return variant
+    
+    print(f"⚠️  No variant downloads within {realtime_factor}x real time, using the lowest bitrate")
+    return candidates[-1]
+
+def parse_media_playlist(playlist_content: str, playlist_url: str) -> list:
+    """Returns the absolute segment URLs listed in a media playlist."""
+    segments = []
+    for line in playlist_content.split('\n'):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            segments.append(_resolve_playlist_url(playlist_url, line))
+    return segments
+
+def _playlist_tag_value(playlist_content: str, tag: str):
+    """Returns the numeric value of a playlist header tag such as #EXT-X-TARGETDURATION, or None."""
+    match = re.search(rf'^{re.escape(tag)}:([\d.]+)', playlist_content, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def _is_complete_playlist(playlist_content: str) -> bool:
+    """True for media playlists that will not grow: #EXT-X-ENDLIST or #EXT-X-PLAYLIST-TYPE:VOD."""
+    return ('#EXT-X-ENDLIST' in playlist_content
+            or re.search(r'^#EXT-X-PLAYLIST-TYPE:\s*VOD\s*$', playlist_content, re.MULTILINE) is not None)
+
+def _drain_segment_futures(futures: dict, pbar, timeout=None):
+    """Waits up to timeout for segment fetches, reports finished ones and returns (ok, failed) counts."""
+    done, not_done = wait(futures, timeout=timeout)
+    ok = failed = 0
+    for future in done:
+        index = futures.pop(future)
+        try:
+            future.result()
+            ok += 1
+            pbar.update(1)
+        except Exception as e:
+            print(f"Error downloading segment {index}: {e}")
+            failed += 1
+    return ok, failed
+
+def download_hls_live(m3u8_url: str, output_path: Path, title: str = None, referer: str = None,
+                      max_workers: int = None, max_duration: float = None):
+    """Captures a live or event HLS playlist by re-polling it and appending new segments.
+
+    Polling follows the playlist's target duration and media sequence numbers, so
+    each segment is fetched once. Capture stops on #EXT-X-ENDLIST (or a VOD
+    playlist type), when no new segment appeared for HLS_LIVE_STALL_TARGETS
+    target durations, after max_duration seconds (HLS_LIVE_MAX_DURATION by
+    default) or on Ctrl-C. max_workers defaults to HLS_SEGMENT_WORKERS.
+    """
+    if max_workers is None:
+        max_workers = HLS_SEGMENT_WORKERS
+    if max_duration is None:
+        max_duration = HLS_LIVE_MAX_DURATION
+    
+    headers = {}
+    if referer:
+        headers['Referer'] = referer
+    
+    file_path = claim_output_path(output_path / hls_output_filename(title))
+    job_limiter = ratelimit.new_job_limiter()
+    futures = {}  # future -> segment index
+    scheduled_segments = downloaded_segments = failed_segments = missed_segments = 0
+    last_sequence = None
+    start_time = last_new_time = time.monotonic()
+    
+    tmp_path = temp_output_path(file_path)
+    
+    print(f"📡 Capturing live stream to {file_path} (press Ctrl-C to stop)")
+    with open(tmp_path, 'wb') as output_file:
+        assembler = _SegmentAssembler(output_file, HLS_REORDER_BUFFER_BYTES)
+        with tqdm(desc="Live segments", unit='seg') as pbar, \
+                ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            try:
+                while True:
+                    playlist_response = get_session().get(m3u8_url, headers=headers)
+                    playlist_response.raise_for_status()
+                    playlist_content = playlist_response.text
+                    
+                    media_sequence = int(_playlist_tag_value(playlist_content, '#EXT-X-MEDIA-SEQUENCE') or 0)
+                    target_duration = _playlist_tag_value(playlist_content, '#EXT-X-TARGETDURATION') or 6
+                    segments = parse_media_playlist(playlist_content, m3u8_url)
+                    
+                    # Schedule only segments we have not seen yet
+                    new_segments = 0
+                    for offset, segment_url in enumerate(segments):
+                        sequence = media_sequence + offset
+                        if last_sequence is not None and sequence <= last_sequence:
+                            continue
+                        if last_sequence is not None and sequence > last_sequence + 1:
+                            missed_segments += sequence - last_sequence - 1
+                            print(f"⚠️  Warning: playlist moved on, {sequence - last_sequence - 1} segment(s) missed")
+                        future = executor.submit(_fetch_hls_segment, scheduled_segments, segment_url, headers, assembler,
+                                                 job_limiter)
+                        futures[future] = scheduled_segments
+                        scheduled_segments += 1
+                        new_segments += 1
+                        last_sequence = sequence
+                    
+                    if _is_complete_playlist(playlist_content):
+                        print("\nEnd of stream reached (#EXT-X-ENDLIST)")
+                        break
+                    if new_segments:
+                        last_new_time = time.monotonic()
+                    elif time.monotonic() - last_new_time >= HLS_LIVE_STALL_TARGETS * target_duration:
+                        print(f"\nNo new segments for {time.monotonic() - last_new_time:.0f}s, stream appears to have stopped")
+                        break
+                    if max_duration and time.monotonic() - start_time >= max_duration:
+                        print(f"\nDuration limit of {max_duration:g}s reached")
+                        break
+                    
+                    # Reload after one target duration, or half of it when nothing changed
+                    poll_deadline = time.monotonic() + (target_duration if new_segments else target_duration / 2)
+                    while time.monotonic() < poll_deadline:
+                        if futures:
+                            ok, failed = _drain_segment_futures(futures, pbar, poll_deadline - time.monotonic())
+                            downloaded_segments += ok
+                            failed_segments += failed
+                        else:
+                            time.sleep(max(0, poll_deadline - time.monotonic()))
+            except KeyboardInterrupt:
+                print("\nCapture stopped by user, finishing segments in progress...")
+            except requests.exceptions.RequestException as e:
+                print(f"\n❌ Error polling live playlist: {e}")
+            
+            ok, failed = _drain_segment_futures(futures, pbar)
+            downloaded_segments += ok
+            failed_segments += failed
+    
+    if failed_segments or missed_segments:
+        print(f"⚠️  Warning: {failed_segments} segment(s) failed, {missed_segments} missed")
+    if not downloaded_segments:
+        print("❌ Failed to download any segments")
+        tmp_path.unlink(missing_ok=True)
+        return None
+    
+    os.replace(tmp_path, file_path)
+    print(f"Captured {downloaded_segments} segments ({assembler.bytes_written / (1024*1024):.2f} MB)")
+    print(f"✅ Live HLS capture complete: {file_path}")
+    return file_path
+
+def _hls_job_key(m3u8_url: str, segments: list) -> str:
+    """Identifies an HLS job by its playlist and segment paths, ignoring query strings that carry rotating tokens."""
+    digest = hashlib.sha1(urlparse(m3u8_url).path.encode())
+    for segment_url in segments:
+        digest.update(b'\n' + urlparse(segment_url).path.encode())
+    return digest.hexdigest()
+
+def _save_hls_manifest(manifest_path: Path, manifest: dict):
+    """Writes the job manifest atomically so a crash never leaves it half written."""
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+def _load_hls_manifest(manifest_path: Path, part_path: Path, m3u8_url: str, segments: list):
+    """Returns (manifest, next_index, resume_bytes) for an HLS job.
+
+    A manifest left by an earlier run of the same playlist is reused: the .part
+    file is trusted up to the longest run of completed segments from the start
+    that it actually contains, and everything after that is fetched again.
+    """
+    key = _hls_job_key(m3u8_url, segments)
+    manifest = _load_json(manifest_path) if part_path.exists() else None
+    if not manifest or manifest.get('key') != key or len(manifest.get('segments', [])) != len(segments):
+        manifest = {
+            'playlist_url': m3u8_url,
+            'key': key,
+            'segments': [{'status': 'pending', 'bytes': 0} for _ in segments],
         }
+        return manifest, 0, 0
+    
+    part_size = part_path.stat().st_size
+    next_index = resume_bytes = 0
+    for segment in manifest['segments']:
+        if segment['status'] != 'done' or resume_bytes + segment['bytes'] > part_size:
+            break
+        resume_bytes += segment['bytes']
+        next_index += 1
+    for segment in manifest['segments'][next_index:]:
+        segment.update(status='pending', bytes=0)
+    return manifest, next_index, resume_bytes
+
+def download_hls_alternative(m3u8_url: str, output_path: Path, title: str = None, referer: str = None,
+                             max_workers: int = None):
+    """Alternative method to download HLS stream by downloading segments manually.
+
+    max_workers defaults to HLS_SEGMENT_WORKERS.
+    """
+    if max_workers is None:
+        max_workers = HLS_SEGMENT_WORKERS
+    try:
+        headers = {}
         
         if referer:
             headers['Referer'] = referer
         
         # Download the m3u8 playlist
         print("Downloading playlist...")
-        playlist_response = requests.get(m3u8_url, headers=headers)
+        playlist_response = get_session().get(m3u8_url, headers=headers)
         playlist_response.raise_for_status()
         
         playlist_content = playlist_response.text
@@ -125,52 +1105,26 @@ def download_hls_alternative(m3u8_url: str, output_path: Path, title: str = None
         
         # Check if this is a master playlist (contains #EXT-X-STREAM-INF)
         if '#EXT-X-STREAM-INF' in playlist_content:
-            print("Master playlist detected, finding best quality stream...")
+            print("Master playlist detected, selecting a stream...")
             
-            # Parse master playlist to find the best quality stream
-            lines = playlist_content.split('\n')
-            best_bandwidth = 0
-            best_playlist_url = None
+            variant = select_variant(playlist_content, m3u8_url, headers)
             
-            for i, line in enumerate(lines):
-                if line.startswith('#EXT-X-STREAM-INF'):
-                    # Extract bandwidth
-                    bandwidth_match = re.search(r'BANDWIDTH=(\d+)', line)
-                    if bandwidth_match:
-                        bandwidth = int(bandwidth_match.group(1))
-                        # Get the next line which should be the playlist URL
-                        if i + 1 < len(lines):
-                            playlist_url = lines[i + 1].strip()
-                            if playlist_url and bandwidth > best_bandwidth:
-                                best_bandwidth = bandwidth
-                                best_playlist_url = playlist_url
-            
-            if best_playlist_url:
-                # Make URL absolute if relative
-                if not best_playlist_url.startswith('http'):
-                    base_url = '/'.join(m3u8_url.split('/')[:-1]) + '/'
-                    best_playlist_url = base_url + best_playlist_url
-                
-                print(f"Found best quality stream: {best_playlist_url} (bandwidth: {best_bandwidth})")
+            if variant:
+                print(f"Selected stream: {variant['url']} ({_describe_variant(variant)})")
                 
                 # Recursively download the actual playlist
-                return download_hls_alternative(best_playlist_url, output_path, title, referer)
+                return download_hls_alternative(variant['url'], output_path, title, referer, max_workers)
             else:
                 print("❌ No valid stream found in master playlist")
                 return
         
+        # Live and event playlists keep growing until they carry #EXT-X-ENDLIST
+        if not _is_complete_playlist(playlist_content):
+            print("Live playlist detected (no #EXT-X-ENDLIST), switching to live capture...")
+            return download_hls_live(m3u8_url, output_path, title, referer, max_workers)
+        
         # Parse the playlist to get segment URLs
-        segments = []
-        base_url = '/'.join(m3u8_url.split('/')[:-1]) + '/'
-        
-        lines = playlist_content.split('\n')
-        for line in lines:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                if line.startswith('http'):
-                    segments.append(line)
-                else:
-                    segments.append(base_url + line)
+        segments = parse_media_playlist(playlist_content, m3u8_url)
         
         if not segments:
             print("❌ No video segments found in playlist")
@@ -186,269 +1140,481 @@ def download_hls_alternative(m3u8_url: str, output_path: Path, title: str = None
             print("This might be a master playlist or incomplete playlist.")
         
         # Create a safe filename
-        if title:
-            safe_filename = utils.sanitize_filename(title)
-            if not safe_filename.endswith('.mp4'):
-                safe_filename += '.mp4'
-        else:
-            safe_filename = "video_stream.mp4"
+        file_path = claim_output_path(output_path / hls_output_filename(title))
+        part_path = file_path.with_name(file_path.name + '.part')
+        manifest_path = file_path.with_name(file_path.name + '.hls.json')
         
-        file_path = output_path / safe_filename
+        # Segments are appended to a .part file while a manifest records which
+        # ones it holds, so an interrupted job resumes where it stopped
+        manifest, start_index, resume_bytes = _load_hls_manifest(manifest_path, part_path, m3u8_url, segments)
+        if start_index:
+            print(f"Resuming: {start_index} of {len(segments)} segments already downloaded")
         
-        # Create a local temporary directory in the data folder
-        temp_dir = utils.DATA_DIR / 'temp'
-        temp_dir.mkdir(exist_ok=True)
+        failed_segments = 0
+        job_limiter = ratelimit.new_job_limiter()
+        last_save = time.monotonic()
         
-        # Create a unique subdirectory for this download
-        import time
-        temp_download_dir = temp_dir / f"hls_download_{int(time.time())}"
-        temp_download_dir.mkdir(exist_ok=True)
+        def record_segment(index: int, size: int):
+            # Called in playlist order while the assembler holds its lock
+            nonlocal last_save
+            manifest['segments'][index] = {'status': 'done', 'bytes': size}
+            if time.monotonic() - last_save >= HLS_MANIFEST_INTERVAL:
+                output_file.flush()
+                _save_hls_manifest(manifest_path, manifest)
+                last_save = time.monotonic()
         
-        try:
-            segment_files = []
-            failed_segments = 0
-            
-            # Download all segments
-            print("Downloading video segments...")
-            with tqdm(total=len(segments), desc="Segments") as pbar:
-                for i, segment_url in enumerate(segments):
-                    try:
-                        segment_response = requests.get(segment_url, headers=headers, timeout=30)
-                        segment_response.raise_for_status()
-                        
-                        # Check if we actually got video data
-                        if len(segment_response.content) < 1000:  # Segments should be much larger
-                            print(f"⚠️  Warning: Segment {i} is suspiciously small ({len(segment_response.content)} bytes)")
-                        
-                        segment_file = temp_download_dir / f"segment_{i:04d}.ts"
-                        with open(segment_file, 'wb') as f:
-                            f.write(segment_response.content)
-                        
-                        segment_files.append(segment_file)
-                        pbar.update(1)
-                        
-                    except Exception as e:
-                        print(f"Error downloading segment {i}: {e}")
-                        failed_segments += 1
-                        continue
-            
-            if not segment_files:
-                print("❌ Failed to download any segments")
-                return
-            
-            if failed_segments > 0:
-                print(f"⚠️  Warning: {failed_segments} segments failed to download")
-            
-            print(f"Successfully downloaded {len(segment_files)} segments")
-            
-            # Calculate total size to verify we have substantial content
-            total_size = sum(segment_file.stat().st_size for segment_file in segment_files)
-            print(f"Total downloaded size: {total_size / (1024*1024):.2f} MB")
-            
-            if total_size < 10 * 1024 * 1024:  # Less than 10MB for a 1h+ video is suspicious
-                print("⚠️  Warning: Total download size seems too small for the expected video length")
-            
-            # Method 1: Try direct concatenation using binary mode
-            print("Concatenating segments using binary merge...")
-            try:
-                with open(file_path, 'wb') as output_file:
-                    for segment_file in segment_files:
-                        with open(segment_file, 'rb') as input_file:
-                            shutil.copyfileobj(input_file, output_file)
-                
-                # Verify the final file size
-                final_size = file_path.stat().st_size
-                print(f"Final file size: {final_size / (1024*1024):.2f} MB")
-                
-                print(f"✅ HLS download complete (binary merge): {file_path}")
-                return
-                
-            except Exception as e:
-                print(f"Binary merge failed: {e}")
-                print("Trying ffmpeg concatenation...")
-            
-            # Method 2: Use ffmpeg with proper file list format
+        # Download all segments using a bounded worker pool, appending them to
+        # the output file in playlist order as soon as they arrive
+        print(f"Downloading video segments ({max_workers} workers)...")
+        with open(part_path, 'r+b' if start_index else 'wb') as output_file:
+            output_file.seek(resume_bytes)
+            output_file.truncate()
+            _save_hls_manifest(manifest_path, manifest)
+            assembler = _SegmentAssembler(output_file, HLS_REORDER_BUFFER_BYTES, start_index, resume_bytes,
+                                          on_segment=record_segment, skip_failed=False)
             try:
-                # Create a file list for ffmpeg with proper escaping
-                filelist_path = temp_download_dir / "filelist.txt"
-                with open(filelist_path, 'w', encoding='utf-8') as f:
-                    for segment_file in segment_files:
-                        # Use forward slashes and escape the path properly
-                        escaped_path = str(segment_file).replace('\\', '/')
-                        f.write(f"file '{escaped_path}'\n")
-                
-                # Concatenate segments using ffmpeg
-                print("Concatenating segments with ffmpeg...")
-                concat_cmd = [
-                    'ffmpeg',
-                    '-f', 'concat',
-                    '-safe', '0',
-                    '-i', str(filelist_path),
-                    '-c', 'copy',
-                    '-y',
-                    str(file_path)
-                ]
-                
-                result = subprocess.run(concat_cmd, capture_output=True, text=True)
-                
-                if result.returncode == 0:
-                    final_size = file_path.stat().st_size
-                    print(f"Final file size: {final_size / (1024*1024):.2f} MB")
-                    print(f"✅ HLS download complete (ffmpeg): {file_path}")
-                else:
-                    print(f"❌ Error concatenating segments with ffmpeg: {result.stderr}")
-                    
-            except Exception as e:
-                print(f"❌ Error in ffmpeg concatenation: {e}")
-                
-        finally:
-            # Clean up temporary directory
-            try:
-                shutil.rmtree(temp_download_dir)
-                print("Temporary files cleaned up")
-            except Exception as e:
-                print(f"Warning: Could not clean up temporary files: {e}")
+                with tqdm(total=len(segments), initial=start_index, desc="Segments") as pbar, \
+                        ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                    futures = {
+                        executor.submit(_fetch_hls_segment, i, segments[i], headers, assembler, job_limiter): i
+                        for i in range(start_index, len(segments))
+                    }
+                    try:
+                        for future in as_completed(futures):
+                            i = futures[future]
+                            if future.cancelled():
+                                continue
+                            try:
+                                future.result()
+                                pbar.update(1)
+                            except _SegmentAborted:
+                                pass
+                            except Exception as e:
+                                print(f"Error downloading segment {i} after {HLS_SEGMENT_RETRIES} retries: {e}")
+                                manifest['segments'][i]['status'] = 'failed'
+                                failed_segments += 1
+                                # Stop here rather than leave a gap in the file
+                                for pending in futures:
+                                    pending.cancel()
+                    except BaseException:
+                        # Ctrl-C: stop the workers before the pool waits for them
+                        assembler.abort()
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+            finally:
+                # The manifest always describes what is actually on disk
+                output_file.flush()
+                _save_hls_manifest(manifest_path, manifest)
+        
+        if assembler.next_index < len(segments):
+            print(f"❌ Stopped at segment {assembler.next_index} of {len(segments)} "
+                  f"({failed_segments} segment(s) failed after retries).")
+            print("Progress was saved; downloading the same playlist again will resume it.")
+            return
+        
+        part_path.replace(file_path)
+        manifest_path.unlink(missing_ok=True)
+        print(f"Successfully downloaded {len(segments) - start_index} segments")
+        
+        # Verify we have substantial content
+        total_size = assembler.bytes_written
+        print(f"Total downloaded size: {total_size / (1024*1024):.2f} MB")
+        
+        if total_size < 10 * 1024 * 1024:  # Less than 10MB for a 1h+ video is suspicious
+            print("⚠️  Warning: Total download size seems too small for the expected video length")
+        
+        print(f"✅ HLS download complete (streamed): {file_path}")
+        return file_path
                 
     except Exception as e:
         print(f"❌ Error in alternative HLS download: {e}")
 
-def extract_video_sources(html_content: str):
-    """Extracts video sources from HTML content."""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    sources = []
+def _page_cache_paths(url: str):
+    """Returns the (body, metadata) cache file paths for a page URL."""
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    cache_dir = utils.get_cache_dir('pages')
+    return cache_dir / f"{key}.html", cache_dir / f"{key}.json"
+
+def load_cached_page(url: str):
+    """Returns (metadata, body) of a cached page, or None if it is not cached."""
+    body_path, meta_path = _page_cache_paths(url)
+    metadata = _load_json(meta_path)
+    if not metadata or metadata.get('url') != url or not body_path.exists():
+        return None
+    return metadata, body_path.read_text(encoding='utf-8')
+
+def conditional_headers(metadata: dict) -> dict:
+    """Builds If-None-Match / If-Modified-Since headers from cached page metadata."""
+    headers = {}
+    if metadata.get('etag'):
+        headers['If-None-Match'] = metadata['etag']
+    if metadata.get('last_modified'):
+        headers['If-Modified-Since'] = metadata['last_modified']
+    return headers
+
+def store_cached_page(url: str, response_headers, body: str):
+    """Caches a page body if the response carries validators for revalidation."""
+    etag = response_headers.get('ETag')
+    last_modified = response_headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return
     
-    # Look for video tags
-    videos = soup.find_all('video')
-    for video in videos:
-        # Check for src attribute on video tag
-        if video.get('src'):
-            sources.append(video.get('src'))
-        
-        # Check for source tags within video
-        source_tags = video.find_all('source')
-        for source in source_tags:
-            if source.get('src'):
-                sources.append(source.get('src'))
+    body_path, meta_path = _page_cache_paths(url)
+    metadata = {'url': url, 'etag': etag, 'last_modified': last_modified}
+    # Write to temporary files first so concurrent readers never see half a page
+    for path, content in ((body_path, body), (meta_path, json.dumps(metadata))):
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(content, encoding='utf-8')
+        os.replace(tmp_path, path)
+
+def fetch_page(url: str, headers: dict = None) -> str:
+    """Fetches an HTML page, revalidating an on-disk cached copy with ETag / If-Modified-Since."""
+    request_headers = dict(headers or {})
+    cached = load_cached_page(url)
+    if cached:
+        request_headers.update(conditional_headers(cached[0]))
     
-    # Also look for standalone source tags
-    standalone_sources = soup.find_all('source')
-    for source in standalone_sources:
-        if source.get('src'):
-            sources.append(source.get('src'))
+    response = get_session().get(url, headers=request_headers)
+    if cached and response.status_code == 304:
+        print("Page unchanged, using cached copy")
+        return cached[1]
+    response.raise_for_status()
     
-    return sources
+    page_content = response.text
+    store_cached_page(url, response.headers, page_content)
+    return page_content
 
-def extract_video_title(html_content: str):
-    """Attempts to extract video title from HTML content."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+def _declared_size(tag):
+    """Returns the quality a source tag declares (e.g. size="720" or label="1080p"), or None."""
+    for attribute in ('size', 'res', 'data-res', 'data-quality', 'label'):
+        match = re.search(r'(\d{3,4})', str(tag.get(attribute) or ''))
+        if match:
+            return int(match.group(1))
+    return None
+
+def extract_page_media(html_content: str) -> dict:
+    """Parses a page once and returns its video sources, title and iframe URLs.
+
+    Uses the lxml parser when it is installed and falls back to html.parser.
+    """
+    soup = BeautifulSoup(html_content, HTML_PARSER)
+    sources = []
+    source_details = []
     
-    # Try to find title in data-plyr-config
+    # Look for video tags, their source children and standalone source tags
+    for tag in soup.find_all(['video', 'source']):
+        src = tag.get('src')
+        if src and src not in sources:
+            sources.append(src)
+            source_details.append({'url': src, 'type': tag.get('type'), 'size': _declared_size(tag)})
+    
+    # Try to find title in data-plyr-config, then in the page title
+    title = None
     video = soup.find('video')
     if video and video.get('data-plyr-config'):
-        config = video.get('data-plyr-config')
-        title_match = re.search(r'"title":\s*"([^"]+)"', config)
+        title_match = re.search(r'"title":\s*"([^"]+)"', video.get('data-plyr-config'))
         if title_match:
-            return title_match.group(1)
+            title = title_match.group(1)
+    if not title:
+        title_tag = soup.find('title')
+        if title_tag:
+            title = title_tag.get_text().strip()
     
-    # Try to find title in page title
-    title_tag = soup.find('title')
-    if title_tag:
-        return title_tag.get_text().strip()
+    iframes = []
+    for iframe in soup.find_all('iframe'):
+        iframe_src = iframe.get('src')
+        if not iframe_src:
+            continue
+        # If the src is protocol-relative (starts with //), add https:
+        if iframe_src.startswith('//'):
+            iframe_src = 'https:' + iframe_src
+        iframes.append(iframe_src)
     
-    return None
+    return {'sources': sources, 'source_details': source_details, 'title': title, 'iframes': iframes}
+
+def extract_video_sources(html_content: str):
+    """Extracts video sources from HTML content."""
+    return extract_page_media(html_content)['sources']
+
+def extract_video_title(html_content: str):
+    """Attempts to extract video title from HTML content."""
+    return extract_page_media(html_content)['title']
+
+def classify_media_url(url: str, declared_type: str = None):
+    """Returns 'hls', 'video', 'audio' or 'unknown' for a media source, or None if it is not downloadable."""
+    if url.startswith(('blob:', 'data:')):
+        return None
+    path = urlparse(url).path.lower()
+    declared_type = (declared_type or '').lower()
+    if path.endswith('.m3u8') or 'mpegurl' in declared_type:
+        return 'hls'
+    if path.endswith(VIDEO_EXTENSIONS) or declared_type.startswith('video/'):
+        return 'video'
+    if path.endswith(AUDIO_EXTENSIONS) or declared_type.startswith('audio/'):
+        return 'audio'
+    return 'unknown'
+
+def _fetch_page_media(url: str, referer: str = None):
+    """Fetches and parses one page for the crawler, returning None on errors."""
+    headers = {'Referer': referer} if referer else {}
+    try:
+        return extract_page_media(fetch_page(url, headers))
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️  Could not fetch {url}: {e}")
+        return None
+
+def crawl_page_media(url: str, referer: str = None, max_depth: int = None,
+                     max_pages: int = None, max_workers: int = None) -> list:
+    """Breadth-first crawl of a page and its iframes, returning ranked media candidates.
+
+    All iframes of one level are fetched concurrently. Each page is visited once,
+    the crawl stops after max_depth iframe levels or max_pages pages, and the
+    candidates are sorted best first (see _candidate_rank). Limits left as None
+    use CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES and CRAWL_WORKERS.
+    """
+    if max_depth is None:
+        max_depth = CRAWL_MAX_DEPTH
+    if max_pages is None:
+        max_pages = CRAWL_MAX_PAGES
+    if max_workers is None:
+        max_workers = CRAWL_WORKERS
+    visited = {url}
+    level = [(url, referer)]
+    candidates = []
+    pages_fetched = 0
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for depth in range(max_depth + 1):
+            if not level:
+                break
+            level = level[:max(0, max_pages - pages_fetched)]
+            pages_fetched += len(level)
+            results = executor.map(lambda page: _fetch_page_media(*page), level)
+            
+            next_level = []
+            for (page_url, page_referer), page_media in zip(level, results):
+                if not page_media:
+                    continue
+                for source in page_media['source_details']:
+                    source_url = urljoin(page_url, source['url'])
+                    kind = classify_media_url(source_url, source['type'])
+                    if kind:
+                        candidates.append({
+                            'url': source_url,
+                            'kind': kind,
+                            'size': source['size'],
+                            'title': page_media['title'],
+                            'page_url': page_url,
+                            'depth': depth,
+                            'order': len(candidates),
+                        })
+                for iframe_src in page_media['iframes']:
+                    iframe_url = urljoin(page_url, iframe_src)
+                    if iframe_url not in visited and iframe_url.startswith('http'):
+                        visited.add(iframe_url)
+                        next_level.append((iframe_url, page_url))
+            level = next_level
+    
+    return sorted(candidates, key=_candidate_rank)
+
+def _candidate_rank(candidate: dict):
+    """Sort key: HLS before direct video, audio and unknown; then larger declared size, shallower, earlier."""
+    kind_order = {'hls': 0, 'video': 1, 'audio': 2, 'unknown': 3}
+    return (kind_order[candidate['kind']], -(candidate['size'] or 0), candidate['depth'], candidate['order'])
 
 def download_from_iframe(url: str, output_path: Path, referer: str = None):
-    """Attempts to find and download media from an iframe source."""
+    """Attempts to find and download media from a page and the iframes embedded in it."""
     try:
-        print(f"Fetching iframe page: {url}")
+        print(f"Crawling page for media: {url}")
+        candidates = crawl_page_media(url, referer)
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        if not candidates:
+            print("❌ No video sources or iframes found on the page.")
+            return None
         
-        if referer:
-            headers['Referer'] = referer
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        page_content = response.text
-        soup = BeautifulSoup(page_content, 'html.parser')
-        
-        # First, try to find video sources directly in this page
-        video_sources = extract_video_sources(page_content)
+        print(f"Found {len(candidates)} media source(s)")
+        for i, candidate in enumerate(candidates):
+            size = f" {candidate['size']}p" if candidate['size'] else ""
+            print(f"Source {i+1}: [{candidate['kind']}{size}, depth {candidate['depth']}] {candidate['url']}")
         
-        if video_sources:
-            print(f"Found {len(video_sources)} video source(s)")
-            
-            # Extract title if available
-            title = extract_video_title(page_content)
-            
-            for i, source in enumerate(video_sources):
-                print(f"Source {i+1}: {source}")
-                
-                # Handle different types of sources
-                if source.startswith('blob:'):
-                    print(f"⚠️  Skipping blob URL (not downloadable): {source}")
-                    continue
-                elif source.endswith('.m3u8'):
-                    print("Detected HLS stream (.m3u8)")
-                    download_hls_stream(source, output_path, title, url)
-                    return
-                elif any(source.endswith(ext) for ext in ['.mp4', '.mp3', '.wav', '.mov', '.mkv']):
-                    print("Detected direct media file")
-                    download_direct_url(source, output_path, headers)
-                    return
-                else:
-                    print(f"Unknown source type, attempting direct download: {source}")
-                    download_direct_url(source, output_path, headers)
-                    return
-        
-        # If no video sources found, try to find iframe
-        iframe = soup.find('iframe')
-        if iframe:
-            iframe_src = iframe.get('src')
-            if iframe_src:
-                # If the src is protocol-relative (starts with //), add https:
-                if iframe_src.startswith('//'):
-                    iframe_src = 'https:' + iframe_src
-                    
-                print(f"Found iframe src: {iframe_src}")
-                
-                # Recursively process the iframe content
-                download_from_iframe(iframe_src, output_path, url)
-                return
+        # Try the best candidate first and fall back to the next ones
+        for candidate in candidates:
+            print(f"Trying: {candidate['url']}")
+            if candidate['kind'] == 'hls':
+                result = download_hls_stream(candidate['url'], output_path, candidate['title'], candidate['page_url'])
+            else:
+                result = download_direct_url(candidate['url'], output_path, {'Referer': candidate['page_url']})
+            if result:
+                return result
         
-        print("❌ No video sources or iframes found on the page.")
+        print("❌ None of the media sources could be downloaded.")
+        return None
 
     except Exception as e:
         print(f"❌ Error processing iframe URL: {e}")
 
-def handle_download(url: str, download_path: Path):
-    """Determines the type of URL and calls the correct download function."""
+def handle_download(url: str, download_path: Path, use_index: bool = True):
+    """Determines the type of URL and calls the correct download function.
+
+    With use_index, URLs already in the download index are hardlinked into
+    download_path instead of being fetched again, and new downloads are indexed.
+    Returns the path of the downloaded file, or None if the download failed.
+    """
     url = url.strip()
     if not url:
         print("URL cannot be empty.")
         return
 
+    # HLS playlists may be live, so the same URL can yield new content each time
+    if use_index and not url.endswith('.m3u8'):
+        existing = download_index.lookup_url(url)
+        if existing:
+            linked = download_index.link_into(existing, download_path)
+            print(f"♻️  Already downloaded: {existing}")
+            print(f"✅ Reusing existing file: {linked}")
+            return linked
+
+    token = _current_job.token = object()
+    try:
+        result = _download_by_type(url, download_path)
+        if result and use_index:
+            try:
+                result = download_index.record_download(url, result)
+            except Exception as e:
+                print(f"Warning: Could not update download index: {e}")
+        return result
+    finally:
+        _current_job.token = None
+        # Other jobs may reuse this job's filenames from here on
+        _release_output_paths(token)
+
+def _download_by_type(url: str, download_path: Path):
+    """Dispatches a URL to the download function for its type."""
     if 'youtube.com' in url or 'youtu.be' in url:
-        download_youtube(url, download_path)
+        return download_youtube(url, download_path)
     elif url.endswith(('.mp3', '.mp4', '.wav', '.mov', '.mkv')):
-        download_direct_url(url, download_path)
+        return download_direct_url(url, download_path)
     elif url.endswith('.m3u8'):
-        download_hls_stream(url, download_path)
+        return download_hls_stream(url, download_path)
     else:
         # Assume it might be a page with an iframe or video content
         print("URL is not a direct media link or YouTube. Attempting to find video content...")
-        download_from_iframe(url, download_path)
+        return download_from_iframe(url, download_path)
         
         
 ### Youtube
 
+def _youtube_video_id(url: str):
+    """Returns the video ID of a YouTube URL, or None if it cannot be found."""
+    try:
+        return extract.video_id(url)
+    except Exception:
+        return None
+
+def _youtube_cache_path(video_id: str) -> Path:
+    """Returns the cache file for one video ID."""
+    return utils.get_cache_dir('youtube') / f"{video_id}.json"
+
+def load_youtube_cache(video_id: str):
+    """Returns the cached metadata for a video, or None if missing or older than YOUTUBE_CACHE_TTL."""
+    cache_path = _youtube_cache_path(video_id)
+    try:
+        if time.time() - cache_path.stat().st_mtime > YOUTUBE_CACHE_TTL:
+            cache_path.unlink(missing_ok=True)
+            return None
+    except OSError:
+        return None
+    return _load_json(cache_path)
+
+def save_youtube_cache(video_id: str, backend: str, yt=None, itags=(), title: str = None):
+    """Records the backend and stream itags that worked for a video, then evicts old entries.
+
+    Stream URLs are signed and expire within hours, so they are not stored;
+    pytube still resolves the video, but skips the failing attempts and
+    stream filtering on the next run.
+    """
+    if not video_id:
+        return
+    entry = {'video_id': video_id, 'backend': backend, 'itags': list(itags), 'title': title}
+    try:
+        if yt is not None:
+            entry['title'] = title or yt.title
+            entry['length'] = yt.length
+        cache_path = _youtube_cache_path(video_id)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(entry), encoding='utf-8')
+        os.replace(tmp_path, cache_path)
+        _evict_youtube_cache()
+    except Exception as e:
+        print(f"Warning: Could not update YouTube cache: {e}")
+
+def _evict_youtube_cache():
+    """Removes expired entries, then the oldest ones until the cache fits YOUTUBE_CACHE_MAX_BYTES."""
+    entries = []
+    for cache_path in utils.get_cache_dir('youtube').glob('*.json'):
+        try:
+            stat = cache_path.stat()
+        except OSError:
+            continue
+        if time.time() - stat.st_mtime > YOUTUBE_CACHE_TTL:
+            cache_path.unlink(missing_ok=True)
+        else:
+            entries.append((stat.st_mtime, stat.st_size, cache_path))
+    
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, cache_path in sorted(entries):
+        if total_size <= YOUTUBE_CACHE_MAX_BYTES:
+            break
+        cache_path.unlink(missing_ok=True)
+        total_size -= size
+
+def _download_youtube_cached(url: str, output_path: Path, cached: dict):
+    """Downloads a video straight through the backend and streams recorded in its cache entry."""
+    backend = cached.get('backend')
+    print(f"Using cached {backend} backend for: {cached.get('title') or cached['video_id']}")
+    if cached.get('length'):
+        print(f"Video Length: {cached['length']} seconds")
+    
+    if backend == 'yt-dlp':
+        return download_youtube_ytdlp(url, output_path)
+    
+    yt = YouTube(url)
+    streams = [yt.streams.get_by_itag(itag) for itag in cached.get('itags', [])]
+    if not streams or None in streams:
+        return None
+    
+    if backend == 'pytube-adaptive' and len(streams) == 2:
+        return _download_youtube_adaptive_pair(yt, output_path, streams[0], streams[1], title=cached.get('title'))
+    return _download_youtube_stream(yt, output_path, streams[0], title=cached.get('title'))
+
 def download_youtube(url: str, output_path: Path):
-    """Downloads a YouTube video with a progress bar."""
+    """Downloads a YouTube video with a progress bar.
+
+    The backend and stream itags that worked are cached per video ID, so repeat
+    and batch runs skip pytube attempts that failed before (going straight to
+    yt-dlp) and the stream selection. pytube itself still resolves the video.
+    """
+    video_id = _youtube_video_id(url)
+    # A cached yt-dlp run that failed is not repeated by the fallbacks below
+    ytdlp_failed = False
     try:
         print("Attempting to download YouTube video...")
         
+        cached = load_youtube_cache(video_id) if video_id else None
+        if cached:
+            try:
+                result = _download_youtube_cached(url, output_path, cached)
+            except Exception as e:
+                print(f"Cached YouTube download failed: {e}")
+                result = None
+            if result:
+                # Still valid, so keep the entry alive for another TTL period
+                _youtube_cache_path(video_id).touch()
+                return result
+            ytdlp_failed = cached.get('backend') == 'yt-dlp'
+            print("Cached YouTube streams did not work, resolving again...")
+        
         # Try different approaches for YouTube download
         try:
             # First attempt with default settings
@@ -477,10 +1643,12 @@ def download_youtube(url: str, output_path: Path):
                 print("2. Private/unavailable video")
                 print("3. Regional restrictions")
                 print("4. YouTube API changes")
+                if ytdlp_failed:
+                    return None
                 print("\nTrying alternative method with yt-dlp...")
                 
                 # Fallback to yt-dlp if available
-                return download_youtube_ytdlp(url, output_path)
+                return _download_youtube_ytdlp_cached(url, output_path, video_id)
 
         # Get available streams
         print("Getting available streams...")
@@ -509,90 +1677,187 @@ def download_youtube(url: str, output_path: Path):
         stream = streams.get_highest_resolution()
         if not stream:
             stream = streams.first()
-            
-        print(f"Selected stream: {stream.resolution or 'audio'} - {stream.mime_type}")
-
-        safe_filename = utils.sanitize_filename(f"{yt.title}.{stream.subtype}")
-        print(f"Downloading: {safe_filename}")
-        
-        # Download with progress bar
-        if hasattr(stream, 'filesize') and stream.filesize:
-            # Using TQDM for progress if filesize is known
-            with tqdm(
-                total=stream.filesize, 
-                unit='B', 
-                unit_scale=True, 
-                unit_divisor=1024,
-                desc=safe_filename[:50]
-            ) as pbar:
-                def on_progress(chunk, file_handler, bytes_remaining):
-                    pbar.update(stream.filesize - bytes_remaining - pbar.n)
-
-                yt.register_on_progress_callback(on_progress)
-                stream.download(output_path=str(output_path), filename=safe_filename)
-        else:
-            # Simple download without progress bar
-            print("Downloading... (progress not available)")
-            stream.download(output_path=str(output_path), filename=safe_filename)
-
-        print(f"✅ YouTube download complete: {output_path / safe_filename}")
+        
+        result = _download_youtube_stream(yt, output_path, stream)
+        if result:
+            save_youtube_cache(video_id, 'pytube', yt, [stream.itag])
+        return result
 
     except Exception as e:
         print(f"❌ Error downloading YouTube video: {e}")
+        if ytdlp_failed:
+            return None
         print("Trying alternative method with yt-dlp...")
-        download_youtube_ytdlp(url, output_path)
+        return _download_youtube_ytdlp_cached(url, output_path, video_id)
+
+_pytube_range_lock = threading.Lock()
+_pytube_range_users = 0
+_pytube_default_range = None
+# yt-dlp runs outside the token buckets, so limited runs take turns (see download_youtube_ytdlp)
+_ytdlp_limited_lock = threading.Lock()
 
-def download_youtube_adaptive(yt, output_path: Path, video_streams, audio_streams):
-    """Downloads YouTube video using adaptive streams (separate video and audio)."""
+@contextmanager
+def _pytube_ranges_for_limit():
+    """While a bandwidth limit is set, shrinks pytube's range requests to about one second of it.
+
+    pytube reports progress, where downloads are throttled, only after each
+    range request (9 MiB by default), so large ranges would still arrive in
+    line-speed bursts. The default is restored when the last download ends.
+    """
+    global _pytube_range_users, _pytube_default_range
+    rate = ratelimit.effective_rate()
+    if not rate:
+        yield
+        return
+    with _pytube_range_lock:
+        if not _pytube_range_users:
+            _pytube_default_range = pytube.request.default_range_size
+        _pytube_range_users += 1
+        pytube.request.default_range_size = min(_pytube_default_range, max(PYTUBE_LIMITED_MIN_RANGE, int(rate)))
+    try:
+        yield
+    finally:
+        with _pytube_range_lock:
+            _pytube_range_users -= 1
+            if not _pytube_range_users:
+                pytube.request.default_range_size = _pytube_default_range
+
+def _download_youtube_stream(yt, output_path: Path, stream, title: str = None):
+    """Downloads a single (progressive) YouTube stream with a progress bar."""
+    print(f"Selected stream: {stream.resolution or 'audio'} - {stream.mime_type}")
+
+    file_path = claim_output_path(output_path / utils.sanitize_filename(f"{title or yt.title}.{stream.subtype}"))
+    safe_filename = file_path.name
+    tmp_path = temp_output_path(file_path)
+    print(f"Downloading: {safe_filename}")
+    
+    job_limiter = ratelimit.new_job_limiter()
+    # Download with progress bar
+    if hasattr(stream, 'filesize') and stream.filesize:
+        # Using TQDM for progress if filesize is known
+        with tqdm(
+            total=stream.filesize, 
+            unit='B', 
+            unit_scale=True, 
+            unit_divisor=1024,
+            desc=safe_filename[:50]
+        ) as pbar, _pytube_ranges_for_limit():
+            def on_progress(chunk, file_handler, bytes_remaining):
+                received = stream.filesize - bytes_remaining - pbar.n
+                ratelimit.throttle(received, job_limiter)
+                pbar.update(received)
+
+            yt.register_on_progress_callback(on_progress)
+            stream.download(output_path=str(output_path), filename=tmp_path.name)
+    else:
+        # Simple download without progress bar
+        print("Downloading... (progress not available)")
+        with _pytube_ranges_for_limit():
+            yt.register_on_progress_callback(
+                lambda chunk, file_handler, bytes_remaining: ratelimit.throttle(len(chunk), job_limiter))
+            stream.download(output_path=str(output_path), filename=tmp_path.name)
+
+    os.replace(tmp_path, file_path)
+    print(f"✅ YouTube download complete: {file_path}")
+    return file_path
+
+def _download_youtube_ytdlp_cached(url: str, output_path: Path, video_id: str):
+    """Runs the yt-dlp fallback and remembers it as the working backend on success."""
+    result = download_youtube_ytdlp(url, output_path)
+    if result:
+        save_youtube_cache(video_id, 'yt-dlp')
+    return result
+
+def download_youtube_adaptive(yt, output_path: Path, video_streams, audio_streams, merge_mode: str = None):
+    """Downloads YouTube video using adaptive streams (separate video and audio).
+
+    Both streams download concurrently. merge_mode 'files' (ADAPTIVE_MERGE_MODE
+    default) saves them to data/temp and merges right after; 'pipe' lets ffmpeg
+    fetch and mux both streams in a single pass without intermediate files.
+    """
+    # Select best video and audio streams
+    video_stream = video_streams.get_highest_resolution()
+    audio_stream = audio_streams.get_audio_only()
+    
+    if not video_stream or not audio_stream:
+        print("❌ Could not find suitable video or audio streams")
+        return
+    
+    result = _download_youtube_adaptive_pair(yt, output_path, video_stream, audio_stream, merge_mode)
+    if result:
+        save_youtube_cache(_youtube_video_id(yt.watch_url), 'pytube-adaptive', yt, [video_stream.itag, audio_stream.itag])
+    return result
+
+def _download_youtube_adaptive_pair(yt, output_path: Path, video_stream, audio_stream,
+                                    merge_mode: str = None, title: str = None):
+    """Downloads and merges one video stream and one audio stream."""
     try:
-        # Select best video and audio streams
-        video_stream = video_streams.get_highest_resolution()
-        audio_stream = audio_streams.get_audio_only()
-        
-        if not video_stream or not audio_stream:
-            print("❌ Could not find suitable video or audio streams")
-            return
-            
         print(f"Video stream: {video_stream.resolution} - {video_stream.mime_type}")
         print(f"Audio stream: {audio_stream.abr} - {audio_stream.mime_type}")
         
+        output_file = claim_output_path(output_path / utils.sanitize_filename(f"{title or yt.title}.mp4"))
+        safe_filename = output_file.name
+        total_size = (video_stream.filesize or 0) + (audio_stream.filesize or 0)
+        
+        if merge_mode is None:
+            merge_mode = ADAPTIVE_MERGE_MODE
+        if merge_mode == 'pipe' and ratelimit.is_limited():
+            # ffmpeg would fetch the streams itself and cannot be throttled
+            merge_mode = 'files'
+        if merge_mode == 'pipe':
+            return _merge_adaptive_streams_piped(video_stream, audio_stream, output_file, total_size)
+        
         # Create temporary directory for separate files
         temp_dir = utils.DATA_DIR / 'temp'
-        temp_dir.mkdir(exist_ok=True)
-        
-        import time
-        temp_download_dir = temp_dir / f"youtube_download_{int(time.time())}"
-        temp_download_dir.mkdir(exist_ok=True)
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        temp_download_dir = Path(tempfile.mkdtemp(prefix='youtube_download_', dir=temp_dir))
         
         try:
-            # Download video and audio separately
-            print("Downloading video stream...")
             video_file = temp_download_dir / f"video.{video_stream.subtype}"
-            video_stream.download(output_path=str(temp_download_dir), filename=f"video.{video_stream.subtype}")
-            
-            print("Downloading audio stream...")
             audio_file = temp_download_dir / f"audio.{audio_stream.subtype}"
-            audio_stream.download(output_path=str(temp_download_dir), filename=f"audio.{audio_stream.subtype}")
             
-            # Merge using ffmpeg
-            safe_filename = utils.sanitize_filename(f"{yt.title}.mp4")
-            output_file = output_path / safe_filename
+            # Download video and audio at the same time with one combined progress bar
+            print("Downloading video and audio streams...")
+            pbar_lock = threading.Lock()
+            job_limiter = ratelimit.new_job_limiter()
+            with tqdm(total=total_size, unit='B', unit_scale=True, unit_divisor=1024,
+                      desc=safe_filename[:50]) as pbar:
+                def on_progress(stream, chunk, bytes_remaining):
+                    # Both streams share the job's limit
+                    ratelimit.throttle(len(chunk), job_limiter)
+                    with pbar_lock:
+                        pbar.update(len(chunk))
+                
+                yt.register_on_progress_callback(on_progress)
+                with _pytube_ranges_for_limit(), ThreadPoolExecutor(max_workers=2) as executor:
+                    downloads = [
+                        executor.submit(video_stream.download, output_path=str(temp_download_dir), filename=video_file.name),
+                        executor.submit(audio_stream.download, output_path=str(temp_download_dir), filename=audio_file.name),
+                    ]
+                    for future in downloads:
+                        future.result()
             
+            # Merge using ffmpeg as soon as both streams are complete
             print("Merging video and audio...")
             merge_cmd = [
                 'ffmpeg',
                 '-i', str(video_file),
                 '-i', str(audio_file),
+                '-map', '0:v:0',
+                '-map', '1:a:0',
                 '-c', 'copy',
                 '-y',
-                str(output_file)
+                str(temp_output_path(output_file))
             ]
             
             result = subprocess.run(merge_cmd, capture_output=True, text=True)
             
             if result.returncode == 0:
+                os.replace(temp_output_path(output_file), output_file)
                 print(f"✅ YouTube download complete (adaptive): {output_file}")
+                return output_file
             else:
+                temp_output_path(output_file).unlink(missing_ok=True)
                 print(f"❌ Error merging streams: {result.stderr}")
                 
         finally:
@@ -605,6 +1870,52 @@ def download_youtube_adaptive(yt, output_path: Path, video_streams, audio_stream
     except Exception as e:
         print(f"❌ Error in adaptive YouTube download: {e}")
 
+def _merge_adaptive_streams_piped(video_stream, audio_stream, output_file: Path, total_size: int):
+    """Lets ffmpeg read both stream URLs at once and mux them while they download.
+
+    No intermediate files are written, so elapsed time is bounded by the slower
+    stream and the output is written exactly once.
+    """
+    print("Downloading and merging video and audio in one pass...")
+    merge_cmd = [
+        'ffmpeg',
+        '-hide_banner', '-nostats',
+        '-user_agent', USER_AGENT,
+        '-i', video_stream.url,
+        '-user_agent', USER_AGENT,
+        '-i', audio_stream.url,
+        '-map', '0:v:0',
+        '-map', '1:a:0',
+        '-c', 'copy',
+        '-progress', 'pipe:1',
+        '-y',
+        str(temp_output_path(output_file))
+    ]
+    
+    process = subprocess.Popen(merge_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # Drain stderr in the background so ffmpeg never blocks on a full pipe
+    stderr_lines = deque(maxlen=50)
+    stderr_thread = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+    stderr_thread.start()
+    
+    with tqdm(total=total_size or None, unit='B', unit_scale=True, unit_divisor=1024,
+              desc=output_file.name[:50]) as pbar:
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if key == 'total_size' and value.isdigit():
+                pbar.update(int(value) - pbar.n)
+    
+    process.wait()
+    stderr_thread.join()
+    if process.returncode == 0:
+        os.replace(temp_output_path(output_file), output_file)
+        print(f"✅ YouTube download complete (adaptive, piped): {output_file}")
+        return output_file
+    
+    temp_output_path(output_file).unlink(missing_ok=True)
+    print(f"❌ Error merging streams: {''.join(stderr_lines)}")
+    return None
+
 def download_youtube_ytdlp(url: str, output_path: Path):
     """Fallback method using yt-dlp if available."""
     try:
@@ -623,15 +1934,29 @@ def download_youtube_ytdlp(url: str, output_path: Path):
             '--format', 'best[height<=720]',  # Limit to 720p for reliability
             '--output', str(output_path / '%(title)s.%(ext)s'),
             '--no-playlist',
-            url
+            '--print', 'after_move:filepath',  # Report where the file ended up
         ]
+        limited = ratelimit.is_limited()
+        if limited:
+            ytdlp_cmd.extend(['--limit-rate', str(ratelimit.effective_rate())])
+        ytdlp_cmd.append(url)
         
-        print("Running yt-dlp...")
-        result = subprocess.run(ytdlp_cmd, capture_output=True, text=True)
+        if limited and not _ytdlp_limited_lock.acquire(blocking=False):
+            # Each process gets the whole limit, so concurrent ones would add up past it
+            print("Waiting for another rate-limited yt-dlp download to finish...")
+            _ytdlp_limited_lock.acquire()
+        try:
+            print("Running yt-dlp...")
+            result = subprocess.run(ytdlp_cmd, capture_output=True, text=True)
+        finally:
+            if limited:
+                _ytdlp_limited_lock.release()
         
         if result.returncode == 0:
             print("✅ YouTube download complete (yt-dlp)")
             print(result.stdout)
+            lines = result.stdout.strip().splitlines()
+            return Path(lines[-1]) if lines else None
         else:
             print(f"❌ yt-dlp error: {result.stderr}")
             
@@ -1,8 +1,12 @@
+import argparse
+import sys
 from consolemenu import ConsoleMenu
 from consolemenu.items import FunctionItem
 import utils
 import downloader
 import converter
+import batch
+import ratelimit
 
 def downloader_menu_action():
     """Action to prompt for URL and start download."""
@@ -20,12 +24,58 @@ def converter_menu_action():
     """Action to launch the conversion sub-menu."""
     converter.run_conversion_menu()
 
+def batch_converter_menu_action():
+    """Action to launch the batch conversion sub-menu."""
+    converter.run_batch_conversion_menu()
+
+
+def parse_args():
+    """Parses command line options for non-interactive use."""
+    parser = argparse.ArgumentParser(description="Ultimate Media Tool")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Download every URL listed in FILE (use - for stdin) without the menu")
+    parser.add_argument('--jobs', type=int, default=batch.BATCH_JOBS,
+                        help=f"Maximum concurrent downloads in batch mode (default: {batch.BATCH_JOBS})")
+    parser.add_argument('--per-host', type=int, default=batch.BATCH_PER_HOST,
+                        help=f"Maximum concurrent downloads per host in batch mode (default: {batch.BATCH_PER_HOST})")
+    parser.add_argument('--no-index', action='store_true',
+                        help="Download again even if a URL is already in the download index")
+    parser.add_argument('--limit-rate', type=ratelimit.parse_rate, metavar='RATE',
+                        help="Cap total download bandwidth across all jobs, e.g. 500K or 2M (bytes per second)")
+    parser.add_argument('--job-rate', type=ratelimit.parse_rate, metavar='RATE',
+                        help="Cap the bandwidth of each individual download, e.g. 500K or 2M")
+    parser.add_argument('--convert', metavar='SOURCE',
+                        help="Convert every media file in a folder or glob pattern without the menu (requires --to)")
+    parser.add_argument('--to', metavar='FORMAT', help="Target format for --convert, e.g. mp4, mkv, webm or mp3")
+    parser.add_argument('--cpu-budget', type=float, default=converter.CONVERT_CPU_BUDGET,
+                        help=f"CPU cores batch conversion may keep busy (default: {converter.CONVERT_CPU_BUDGET})")
+    parser.add_argument('--overwrite', action='store_true', help="Overwrite existing outputs in batch conversion")
+    parser.add_argument('--profile', choices=list(converter.ENCODING_PROFILES), default=converter.DEFAULT_PROFILE,
+                        help=f"Encoding speed profile for --convert (default: {converter.DEFAULT_PROFILE})")
+    args = parser.parse_args()
+    if args.convert and not args.to:
+        parser.error("--convert requires --to FORMAT")
+    return args
 
 def main():
     """Main function to set up and display the CLI menu."""
+    args = parse_args()
+    ratelimit.set_rate_limits(args.limit_rate, args.job_rate)
     
     # Initialize directories on startup
-    utils.setup_directories()
+    daily_download_path, _ = utils.setup_directories()
+
+    # Batch mode runs without the interactive menu
+    if args.batch:
+        success = batch.run_batch_cli(args.batch, daily_download_path, args.jobs, args.per_host,
+                                      use_index=not args.no_index)
+        sys.exit(0 if success else 1)
+
+    if args.convert:
+        _, daily_convert_path = utils.get_daily_paths()
+        success = converter.run_batch_conversion_cli(args.convert, args.to.lower().lstrip('.'), daily_convert_path,
+                                                     args.cpu_budget, args.overwrite, args.profile)
+        sys.exit(0 if success else 1)
 
     # Create the menu
     menu = ConsoleMenu("Ultimate Media Tool", "Select an option")
@@ -33,10 +83,12 @@ def main():
     # Create menu items
     download_item = FunctionItem("Download Media", downloader_menu_action)
     convert_item = FunctionItem("Convert Media", converter_menu_action)
+    batch_convert_item = FunctionItem("Batch Convert Media", batch_converter_menu_action)
 
     # Add items to the menu
     menu.append_item(download_item)
     menu.append_item(convert_item)
+    menu.append_item(batch_convert_item)
 
     # Show the menu
     menu.show()
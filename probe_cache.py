@@ -0,0 +1,186 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import ffmpeg
+import utils
+
+# ffprobe processes run in parallel when filling the cache in the background
+PROBE_WORKERS = 4
+
+_db_lock = threading.Lock()
+_inflight_lock = threading.Lock()
+_inflight = {}  # path -> future of a running background probe
+_executor = None
+
+@contextmanager
+def _open_cache():
+    """Opens the probe cache database (creating the schema on first use), commits and closes it."""
+    connection = sqlite3.connect(utils.get_cache_dir('probe') / 'probes.sqlite3', timeout=30)
+    try:
+        with _db_lock, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " data TEXT NOT NULL,"
+                " probed REAL NOT NULL)"
+            )
+            yield connection
+    finally:
+        connection.close()
+
+def _file_key(path: Path):
+    """Returns (path string, size, mtime_ns) identifying the current content of a file."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    return str(path), stat.st_size, stat.st_mtime_ns
+
+def cached_probes(paths) -> dict:
+    """Returns {path: cached probe result or None} without running ffprobe.
+
+    Entries only count while the file keeps the size and mtime it was probed
+    with. A file that could not be probed is cached as {'error': ...}.
+    """
+    results = {}
+    with _open_cache() as connection:
+        for path in paths:
+            results[path] = None
+            try:
+                key, size, mtime_ns = _file_key(path)
+            except OSError:
+                continue
+            row = connection.execute("SELECT size, mtime_ns, data FROM probes WHERE path = ?", (key,)).fetchone()
+            if row and row[0] == size and row[1] == mtime_ns:
+                results[path] = json.loads(row[2])
+    return results
+
+def cached_probe(path: Path):
+    """Returns the cached probe result for one file without running ffprobe, or None."""
+    return cached_probes([path])[path]
+
+def _probe_and_store(path: Path) -> dict:
+    """Runs ffprobe on a file and stores the full format and stream info."""
+    key, size, mtime_ns = _file_key(path)
+    try:
+        data = ffmpeg.probe(key)
+    except ffmpeg.Error as e:
+        data = {'error': (e.stderr or b'').decode(errors='replace').strip() or str(e)}
+    except FileNotFoundError:
+        # ffprobe itself is missing; do not cache that as a property of the file
+        return {'error': "ffprobe not found"}
+    with _open_cache() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO probes (path, size, mtime_ns, data, probed) VALUES (?, ?, ?, ?, ?)",
+            (key, size, mtime_ns, json.dumps(data), time.time())
+        )
+    return data
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _inflight_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix='probe')
+        return _executor
+
+def _submit(path: Path):
+    """Starts a background probe for a file unless one is already running. Returns its future."""
+    key = str(Path(path).resolve())
+    executor = _get_executor()
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = executor.submit(_probe_and_store, path)
+            _inflight[key] = future
+            future.add_done_callback(lambda _, key=key: _forget(key))
+        return future
+
+def _forget(key: str):
+    with _inflight_lock:
+        _inflight.pop(key, None)
+
+def prefetch(paths) -> dict:
+    """Probes every file that is not cached yet in the background.
+
+    Returns {path: future} for the files being probed; cached files are skipped.
+    """
+    return {path: _submit(path) for path, probe in cached_probes(paths).items() if probe is None}
+
+def get_probe(path: Path):
+    """Returns the probe result for a file from the cache, probing it (once) if needed.
+
+    Returns None if the file cannot be read or probed.
+    """
+    data = cached_probe(path)
+    if data is None:
+        try:
+            data = _submit(path).result()
+        except OSError:
+            return None
+    return None if 'error' in data else data
+
+def _parse_duration(value):
+    """Parses seconds ('62.5') or a Matroska style timestamp ('00:01:02.500000000')."""
+    if value in (None, 'N/A'):
+        return None
+    match = re.fullmatch(r'(\d+):(\d+):([\d.]+)', str(value))
+    if match:
+        return int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3))
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def probe_duration(probe: dict):
+    """Returns the duration in seconds from the container, or else the longest stream, or None."""
+    if not probe:
+        return None
+    duration = _parse_duration(probe.get('format', {}).get('duration'))
+    if duration:
+        return duration
+    stream_durations = [
+        _parse_duration(stream.get('duration')) or _parse_duration(stream.get('tags', {}).get('DURATION'))
+        for stream in probe.get('streams', [])
+    ]
+    stream_durations = [d for d in stream_durations if d]
+    return max(stream_durations) if stream_durations else None
+
+def summarize(probe: dict) -> dict:
+    """Extracts the main video/audio codecs, resolution and duration from a probe result."""
+    summary = {'video_codec': None, 'audio_codec': None, 'width': None, 'height': None,
+               'duration': probe_duration(probe)}
+    for stream in (probe or {}).get('streams', []):
+        if stream.get('codec_type') == 'video' and not stream.get('disposition', {}).get('attached_pic'):
+            if summary['video_codec'] is None:
+                summary.update(video_codec=stream.get('codec_name'),
+                               width=stream.get('width'), height=stream.get('height'))
+        elif stream.get('codec_type') == 'audio' and summary['audio_codec'] is None:
+            summary['audio_codec'] = stream.get('codec_name')
+    return summary
+
+def format_duration(seconds: float) -> str:
+    """Formats seconds as H:MM:SS or M:SS."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def describe(probe: dict) -> str:
+    """Short listing text such as 'h264/aac 1920x1080 1:02:03'."""
+    if probe is None:
+        return ""
+    if 'error' in probe:
+        return "unreadable"
+    summary = summarize(probe)
+    codecs = '/'.join(codec for codec in (summary['video_codec'], summary['audio_codec']) if codec)
+    parts = [codecs] if codecs else []
+    if summary['width'] and summary['height']:
+        parts.append(f"{summary['width']}x{summary['height']}")
+    if summary['duration']:
+        parts.append(format_duration(summary['duration']))
+    return ' '.join(parts)
@@ -0,0 +1,71 @@
+import re
+import threading
+import time
+
+# Bandwidth limits in bytes per second (None means unlimited)
+GLOBAL_RATE_LIMIT = None
+JOB_RATE_LIMIT = None
+
+class TokenBucket:
+    """Thread-safe token bucket that paces byte consumption to `rate` bytes per second.
+
+    Callers reserve bytes up front and sleep off any debt outside the lock, so
+    many threads can share one bucket and each gets a fair share of the rate.
+    """
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount: int):
+        """Takes amount tokens, sleeping until the bucket allows it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay > 0:
+            time.sleep(delay)
+
+_global_bucket = None
+
+def set_rate_limits(global_rate: float = None, job_rate: float = None):
+    """Configures the shared global limit and the limit applied to each new download job."""
+    global GLOBAL_RATE_LIMIT, JOB_RATE_LIMIT, _global_bucket
+    GLOBAL_RATE_LIMIT = global_rate or None
+    JOB_RATE_LIMIT = job_rate or None
+    _global_bucket = TokenBucket(GLOBAL_RATE_LIMIT) if GLOBAL_RATE_LIMIT else None
+
+def new_job_limiter():
+    """Returns a bucket for one download job, or None when jobs are not limited."""
+    return TokenBucket(JOB_RATE_LIMIT) if JOB_RATE_LIMIT else None
+
+def is_limited() -> bool:
+    """True if any bandwidth limit is configured."""
+    return bool(GLOBAL_RATE_LIMIT or JOB_RATE_LIMIT)
+
+def effective_rate():
+    """Returns the tightest configured limit in bytes per second, or None."""
+    limits = [rate for rate in (GLOBAL_RATE_LIMIT, JOB_RATE_LIMIT) if rate]
+    return min(limits) if limits else None
+
+def throttle(amount: int, job_limiter: TokenBucket = None):
+    """Accounts amount bytes against the global bucket and the job's bucket."""
+    if _global_bucket is None and job_limiter is None:
+        return
+    if _global_bucket is not None:
+        _global_bucket.consume(amount)
+    if job_limiter is not None:
+        job_limiter.consume(amount)
+
+def parse_rate(text: str) -> int:
+    """Parses a rate such as '500K', '2.5M' or '1GB/s' (bytes per second) into bytes."""
+    match = re.fullmatch(r'([\d.]+)\s*([KMG]?)(?:I?B)?(?:/S)?', text.strip().upper())
+    if not match:
+        raise ValueError(f"Invalid rate: {text}")
+    multipliers = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    return int(float(match.group(1)) * multipliers[match.group(2)])
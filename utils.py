@@ -27,6 +27,12 @@ def sanitize_filename(filename):
     """Removes invalid characters from a string to make it a valid filename."""
     return re.sub(r'[\\/*?:"<>|]', "", filename)
 
+def get_cache_dir(name: str) -> Path:
+    """Returns (and creates) a named cache directory under data/cache."""
+    cache_dir = DATA_DIR / 'cache' / name
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
 def get_daily_paths():
     """Returns the Path objects for today's download and convert directories."""
     today_str = datetime.now().strftime("%Y-%m-%d")